@@ -0,0 +1,47 @@
+# gunicorn.conf.py
+#
+#   cd CompanyFinancials && gunicorn -c gunicorn.conf.py
+#
+# Requests spend almost all their time waiting on InstaFinancials (up to
+# 30s per call), so each worker runs many threads; a few processes are
+# enough to use the CPUs for JSON work. All workers share the SQLite
+# response cache, job store and refresh watchlist under data/.
+
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+# The repository root, for the shared `common` package
+pythonpath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# Build the app (config, client, search index) once, then fork
+preload_app = True
+
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+
+# Upstream timeout (30s) plus retries, with headroom for long-polls
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then; preload makes restarts cheap
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    from web.app import start_background_services
+    start_background_services(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    from web.app import stop_background_services
+    if getattr(worker, "wsgi", None) is not None:
+        stop_background_services(worker.wsgi)
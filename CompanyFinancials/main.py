@@ -1,10 +1,19 @@
 import os
 from flask import Flask, request, render_template, jsonify
+from providers.cache import ResponseCache
 from providers.instafinancials import InstaFinancialsClient
+from providers.singleflight import SingleFlight
 
 # You chose Option B → templates live under web/templates
 app = Flask(__name__, template_folder="web/templates")
 
+# Shared across requests so repeat lookups of the same CIN skip the paid call
+cache = ResponseCache(
+    path=os.environ.get("INSTA_CACHE_PATH", "data/cache/insta_responses.sqlite3"),
+    ttl_seconds=int(os.environ.get("INSTA_CACHE_TTL_SECONDS", 24 * 60 * 60))
+)
+singleflight = SingleFlight()
+
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -25,7 +34,7 @@ def index():
                     raise Exception("INSTA_API_KEY is not configured")
 
                 # Instantiate Insta client
-                client = InstaFinancialsClient(api_key)
+                client = InstaFinancialsClient(api_key, cache=cache, singleflight=singleflight)
 
                 # ✅ CORRECT METHOD + CORRECT PARAMS
                 data = client.fetch_company_data(
@@ -0,0 +1,228 @@
+# pipeline/bulk_fetch.py
+#
+# Bulk CIN refresh:
+#   python -m pipeline.bulk_fetch --input cins.txt --output companies.ndjson
+#   cat cins.txt | python -m pipeline.bulk_fetch --output companies.ndjson --resume
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Set, TextIO
+
+import yaml
+
+from pipeline.fetch_pipeline import fetch_company_by_cin
+from providers.instafinancials import InstaFinancialsClient
+
+if TYPE_CHECKING:  # pyarrow is only imported when --warehouse is given
+    from warehouse.store import WarehouseWriter
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls `1 / rate` seconds apart.
+    A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def normalize_cin(cin: str) -> str:
+    return cin.strip().upper()
+
+
+def read_cins(stream: TextIO) -> Iterator[str]:
+    """
+    Yield one CIN per non-empty, non-comment line, normalized.
+    """
+    for line in stream:
+        cin = normalize_cin(line)
+        if cin and not cin.startswith("#"):
+            yield cin
+
+
+def completed_cins(output_path: str) -> Set[str]:
+    """
+    Collect CINs already written to a previous run's output.
+
+    A trailing partial line (left by an interrupted run) is truncated so
+    that new results are appended on a clean line boundary.
+    """
+    done = set()
+
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, "r+b") as f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if "raw_response" in record:
+                done.add(normalize_cin(record["cin"]))
+            valid_end = f.tell()
+
+        f.truncate(valid_end)
+
+    return done
+
+
+def run_bulk_fetch(
+    client: InstaFinancialsClient,
+    cins: Iterable[str],
+    output: TextIO,
+    workers: int = 8,
+    rate: float = 2.0,
+    skip: Optional[Set[str]] = None,
+    writer: Optional["WarehouseWriter"] = None
+) -> dict:
+    """
+    Fetch every CIN through a bounded pool and stream results as NDJSON.
+
+    At most `workers * 2` lookups are queued at once, so memory stays flat
+    regardless of input size (apart from the set of CINs seen, which
+    keeps a CIN repeated in the input from being fetched twice). Failed CINs are reported on stderr and left
+    out of the output so that `--resume` retries them. With a `writer`,
+    each result is also normalized into the columnar warehouse.
+    """
+    skip = {normalize_cin(cin) for cin in skip or ()}
+    seen: Set[str] = set()
+    limiter = RateLimiter(rate)
+    stats = {"fetched": 0, "failed": 0, "skipped": 0, "duplicates": 0}
+
+    def fetch(cin: str) -> dict:
+        limiter.acquire()
+        return fetch_company_by_cin(client, cin)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                cin = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[BULK FETCH ERROR] {cin}: {e}", file=sys.stderr)
+                    continue
+
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                stats["fetched"] += 1
+
+                if writer is not None:
+                    writer.add(result["cin"], result["raw_response"])
+
+        for cin in map(normalize_cin, cins):
+            if cin in skip:
+                stats["skipped"] += 1
+                continue
+            if cin in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(cin)
+
+            pending[pool.submit(fetch, cin)] = cin
+
+            if len(pending) >= workers * 2:
+                drain(FIRST_COMPLETED)
+
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    return stats
+
+
+def build_client() -> InstaFinancialsClient:
+    local_config = {}
+    if os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH, "r") as f:
+            local_config = yaml.safe_load(f) or {}
+
+    insta_config = local_config.get("insta", {})
+
+    return InstaFinancialsClient(
+        api_key=os.environ.get("INSTA_API_KEY", insta_config.get("api_key")),
+        base_url=insta_config.get(
+            "base_url",
+            "https://instafinancials.com/api/InstaBasic/v1/json"
+        )
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch many CINs from InstaFinancials")
+    parser.add_argument("--input", help="File with one CIN per line (default: stdin)")
+    parser.add_argument("--output", required=True, help="NDJSON output file")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent lookups")
+    parser.add_argument("--rps", type=float, default=2.0, help="Max requests per second (0 = unlimited)")
+    parser.add_argument("--resume", action="store_true", help="Skip CINs already present in --output")
+    parser.add_argument("--warehouse", help="Also ingest results into this warehouse directory")
+    args = parser.parse_args(argv)
+
+    writer = None
+    if args.warehouse:
+        from warehouse.store import Warehouse, WarehouseWriter
+        writer = WarehouseWriter(Warehouse(args.warehouse))
+
+    skip = completed_cins(args.output) if args.resume else set()
+    mode = "a" if args.resume else "w"
+
+    source = open(args.input, "r") if args.input else sys.stdin
+
+    try:
+        with open(args.output, mode) as output:
+            stats = run_bulk_fetch(
+                build_client(),
+                read_cins(source),
+                output,
+                workers=args.workers,
+                rate=args.rps,
+                skip=skip,
+                writer=writer
+            )
+    finally:
+        if args.input:
+            source.close()
+        if writer is not None:
+            writer.flush()
+
+    print(
+        f"[BULK FETCH] fetched={stats['fetched']} "
+        f"failed={stats['failed']} skipped={stats['skipped']} "
+        f"duplicates={stats['duplicates']}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 # pipeline/fetch_pipeline.py
 
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 from providers.instafinancials import InstaFinancialsClient
 
+if TYPE_CHECKING:  # pyarrow is only needed when ingesting
+    from warehouse.store import WarehouseWriter
+
 def fetch_company_by_cin(
     client: InstaFinancialsClient,
     cin: str
@@ -20,3 +23,16 @@ def fetch_company_by_cin(
         "cin": cin,
         "raw_response": response
     }
+
+
+def fetch_and_ingest(
+    client: InstaFinancialsClient,
+    cin: str,
+    writer: "WarehouseWriter"
+) -> Dict:
+    """
+    Fetch a company and queue its normalized rows for the warehouse
+    """
+    result = fetch_company_by_cin(client, cin)
+    writer.add(result["cin"], result["raw_response"])
+    return result
@@ -0,0 +1,46 @@
+# pipeline/ingest.py
+#
+# Load bulk_fetch output into the columnar warehouse:
+#   python -m pipeline.ingest --input companies.ndjson --warehouse data/warehouse
+
+import argparse
+import json
+import sys
+
+from warehouse.store import Warehouse, WarehouseWriter
+
+
+def ingest_ndjson(path: str, writer: WarehouseWriter) -> int:
+    """
+    Stream `{"cin", "raw_response"}` lines into the warehouse writer.
+    """
+    count = 0
+
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "raw_response" not in record:
+                continue
+            writer.add(record["cin"], record["raw_response"])
+            count += 1
+
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest NDJSON company responses into Parquet")
+    parser.add_argument("--input", required=True, help="NDJSON file written by pipeline.bulk_fetch")
+    parser.add_argument("--warehouse", default="data/warehouse", help="Warehouse root directory")
+    parser.add_argument("--batch-size", type=int, default=500, help="Companies per Parquet file")
+    args = parser.parse_args(argv)
+
+    with WarehouseWriter(Warehouse(args.warehouse), batch_size=args.batch_size) as writer:
+        count = ingest_ndjson(args.input, writer)
+
+    print(f"[INGEST] companies={count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
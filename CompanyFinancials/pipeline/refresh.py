@@ -0,0 +1,140 @@
+# pipeline/refresh.py
+#
+# Incremental refresh of tracked companies:
+#   python -m pipeline.refresh --input cins.txt --warehouse data/warehouse
+#   python -m pipeline.refresh --input cins.txt --probe-scope CompanyMasterSummary
+
+import argparse
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Optional
+
+from pipeline.bulk_fetch import RateLimiter, build_client, read_cins
+from pipeline.snapshots import SnapshotStore, last_updated_of
+from providers.instafinancials import InstaFinancialsClient
+
+if TYPE_CHECKING:  # pyarrow is only imported when --warehouse is given
+    from warehouse.store import WarehouseWriter
+
+
+def refresh_company(
+    client: InstaFinancialsClient,
+    store: SnapshotStore,
+    cin: str,
+    writer: Optional["WarehouseWriter"] = None,
+    probe_scope: Optional[str] = None
+) -> Dict:
+    """
+    Re-fetch one company and reprocess only what changed.
+
+    With `probe_scope`, a cheap lookup of that scope is made first; if its
+    CompanyMasterSummary.LastUpdatedDateTime matches the stored snapshot,
+    the full fetch is skipped. Only added or changed sections are written
+    to the snapshot store and the warehouse.
+    """
+    if probe_scope:
+        stored = store.last_updated(cin)
+        if stored:
+            probe = client.fetch_company_data(
+                lookup_type="CompanyCIN",
+                lookup_value=cin,
+                scope=probe_scope,
+                use_cache=False
+            )
+            if last_updated_of(probe) == stored:
+                return {"cin": cin, "status": "unchanged", "full_fetch": False}
+
+    response = client.fetch_company_data(
+        lookup_type="CompanyCIN",
+        lookup_value=cin,
+        scope="All",
+        use_cache=False
+    )
+
+    diff = store.compare(cin, response)
+    touched = diff["added"] + diff["changed"]
+
+    # Also records the latest LastUpdatedDateTime when nothing changed, and
+    # the new hash of reordered sections so they are not diffed again
+    store.save(cin, response, only=touched + diff["reordered"])
+
+    if writer is not None and touched:
+        writer.add(cin, response, sections=touched)
+
+    return {
+        "cin": cin,
+        "status": "changed" if (touched or diff["removed"]) else "unchanged",
+        "full_fetch": True,
+        "diff": diff
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh tracked companies incrementally")
+    parser.add_argument("--input", help="File with one CIN per line (default: stdin)")
+    parser.add_argument("--snapshots", default="data/snapshots/snapshots.sqlite3", help="Snapshot store path")
+    parser.add_argument("--warehouse", help="Ingest changed sections into this warehouse directory")
+    parser.add_argument("--probe-scope", help="Cheap scope used to skip unchanged companies")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent refreshes")
+    parser.add_argument("--rps", type=float, default=2.0, help="Max companies per second (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    client = build_client()
+    store = SnapshotStore(args.snapshots)
+    writer = None
+    if args.warehouse:
+        from warehouse.store import Warehouse, WarehouseWriter
+        writer = WarehouseWriter(Warehouse(args.warehouse))
+    limiter = RateLimiter(args.rps)
+
+    def refresh(cin: str) -> Dict:
+        limiter.acquire()
+        try:
+            return refresh_company(client, store, cin, writer=writer, probe_scope=args.probe_scope)
+        except Exception as e:
+            return {"cin": cin, "status": "failed", "error": str(e)}
+
+    source = open(args.input, "r") if args.input else sys.stdin
+    counts: Dict[str, int] = {}
+
+    def report(result: Dict):
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        if result["status"] != "unchanged":
+            summary = {k: v for k, v in result.items() if k != "diff"}
+            if "diff" in result:
+                summary["sections"] = {
+                    k: result["diff"][k] for k in ("added", "removed", "changed")
+                }
+            print(json.dumps(summary))
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            # As in run_bulk_fetch, at most workers * 2 refreshes are queued,
+            # so the input is read as work completes rather than up front
+            pending = {}
+
+            def drain():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    report(future.result())
+
+            for cin in read_cins(source):
+                pending[pool.submit(refresh, cin)] = cin
+                if len(pending) >= args.workers * 2:
+                    drain()
+
+            while pending:
+                drain()
+    finally:
+        if args.input:
+            source.close()
+        if writer is not None:
+            writer.flush()
+
+    print(f"[REFRESH] {counts}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
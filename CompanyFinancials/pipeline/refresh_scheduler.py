@@ -0,0 +1,551 @@
+# pipeline/refresh_scheduler.py
+#
+# Keeps frequently requested companies warm in the response cache:
+#   python -m pipeline.refresh_scheduler --budget 500 --once
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from providers.cache import ResponseCache, make_key
+from providers.instafinancials import InstaFinancialsClient, is_complete_response
+from providers.singleflight import fcntl
+from pipeline.snapshots import last_updated_of
+
+LOOKUP_TYPE = "CompanyCIN"
+SCOPE = "All"
+
+# Formats seen in CompanyMasterSummary.LastUpdatedDateTime
+LAST_UPDATED_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%m-%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+)
+
+
+def parse_last_updated(value: Optional[str]) -> Optional[float]:
+    """
+    Epoch seconds of a LastUpdatedDateTime value, or None if unparseable.
+    """
+    if not value:
+        return None
+
+    text = str(value).strip().split(".")[0].replace("Z", "")
+    for fmt in LAST_UPDATED_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class RefreshScheduler:
+    """
+    Stale-while-revalidate front for InstaFinancials lookups.
+
+    `get()` answers from the cache whenever it has a response, fresh or
+    stale, and queues stale ones for a background refresh. Every lookup
+    also bumps the CIN's request score; bumps are summed in memory and
+    written to a SQLite watchlist (shared by all workers) at most every
+    `flush_seconds`. The background thread refreshes watched CINs ahead
+    of expiry, highest priority first, where
+
+        priority = request score * (1 + days since LastUpdatedDateTime)
+
+    and the request score decays with a half-life of `half_life_hours`.
+
+    Every worker may start the thread, but only the one holding an flock
+    on `<path>.lock` refreshes; the others just flush their buffered
+    scores and stale CINs (to the shared `urgent` table) and take over
+    the lock when its holder exits.
+    Upstream calls made by the scheduler are counted against
+    `daily_budget` per day, across processes. They never ask for a
+    webhook: an acknowledgement carries no data to cache, and nothing
+    would claim the payload that follows.
+    """
+
+    def __init__(
+        self,
+        client: InstaFinancialsClient,
+        cache: ResponseCache,
+        path: str = "data/scheduler/watchlist.sqlite3",
+        daily_budget: int = 500,
+        interval: float = 60.0,
+        batch_size: int = 10,
+        refresh_ahead_seconds: float = 2 * 60 * 60,
+        half_life_hours: float = 24.0,
+        flush_seconds: float = 5.0
+    ):
+        self.client = client
+        self.cache = cache
+        self.path = path
+        self.daily_budget = daily_budget
+        self.interval = interval
+        self.batch_size = batch_size
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.half_life_seconds = half_life_hours * 60 * 60
+        self.flush_seconds = flush_seconds
+
+        self._local = threading.local()
+        # cin -> (decayed request count, as of), not yet in the watchlist
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._scores_lock = threading.Lock()
+        self._scores_pid = os.getpid()
+        self._flushed_at = time.monotonic()
+        self._leader_file = None
+        self._leader_pid: Optional[int] = None
+        self._urgent: Dict[str, None] = {}
+        self._urgent_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Connections inherited from a pre-fork parent must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.create_function("decay", 1, self._decay)
+            # Created on first use, so nothing is opened before fork
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS watchlist (
+                    cin TEXT PRIMARY KEY,
+                    score REAL NOT NULL DEFAULT 0,
+                    score_at REAL NOT NULL,
+                    last_updated REAL,
+                    last_refreshed REAL NOT NULL DEFAULT 0,
+                    pinned INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS budget (
+                    day TEXT PRIMARY KEY,
+                    calls INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS urgent (
+                    cin TEXT PRIMARY KEY,
+                    queued_at REAL NOT NULL
+                );
+                """
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _lead(self) -> bool:
+        """
+        True while this process holds the scheduler lock; tries to take
+        it (without blocking) otherwise.
+        """
+        if fcntl is None:
+            return True
+        if self._leader_file is not None and self._leader_pid == os.getpid():
+            return True
+
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._leader_file = lock_file
+        self._leader_pid = os.getpid()
+        return True
+
+    def _resign(self):
+        if self._leader_file is not None and self._leader_pid == os.getpid():
+            self._leader_file.close()
+        self._leader_file = None
+        self._leader_pid = None
+
+    def _decay(self, elapsed: float) -> float:
+        return 0.5 ** (max(elapsed, 0.0) / self.half_life_seconds)
+
+    # -------------------------------------------------
+    # Watchlist
+    # -------------------------------------------------
+    def record_request(self, cin: str):
+        now = time.time()
+        cin = cin.upper()
+
+        with self._scores_lock:
+            # Bumps buffered before a fork belong to the parent
+            if self._scores_pid != os.getpid():
+                self._scores, self._scores_pid = {}, os.getpid()
+
+            score, score_at = self._scores.get(cin, (0.0, now))
+            self._scores[cin] = (score * self._decay(now - score_at) + 1, now)
+            due = time.monotonic() - self._flushed_at >= self.flush_seconds
+
+        if due:
+            self.flush_scores()
+
+    def flush_scores(self):
+        """
+        Write buffered request scores and stale CINs to SQLite in one
+        transaction.
+        """
+        with self._scores_lock:
+            if self._scores_pid != os.getpid():
+                self._scores, self._scores_pid = {}, os.getpid()
+            scores, self._scores = self._scores, {}
+            self._flushed_at = time.monotonic()
+
+        with self._urgent_lock:
+            urgent, self._urgent = list(self._urgent), {}
+
+        if not scores and not urgent:
+            return
+
+        now = time.time()
+        conn = self._db()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                """
+                INSERT INTO watchlist (cin, score, score_at) VALUES (?, ?, ?)
+                ON CONFLICT(cin) DO UPDATE SET
+                    score = score * decay(excluded.score_at - score_at) + excluded.score,
+                    score_at = excluded.score_at
+                """,
+                [(cin, score, score_at) for cin, (score, score_at) in scores.items()]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO urgent (cin, queued_at) VALUES (?, ?)",
+                [(cin, now) for cin in urgent]
+            )
+
+    def _take_urgent(self) -> List[Tuple[str, float]]:
+        """
+        Claim every queued stale CIN, oldest first, with its queue time.
+        """
+        conn = self._db()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT cin, queued_at FROM urgent ORDER BY queued_at").fetchall()
+            conn.execute("DELETE FROM urgent")
+        return [(cin, queued_at) for cin, queued_at in rows]
+
+    def _requeue_urgent(self, rows: List[Tuple[str, float]]):
+        """
+        Put claimed stale CINs that were not refreshed back in the queue,
+        keeping their place.
+        """
+        if not rows:
+            return
+        conn = self._db()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR IGNORE INTO urgent (cin, queued_at) VALUES (?, ?)", rows)
+
+    def watch(self, cin: str):
+        """
+        Pin a CIN so it is kept fresh even without user requests.
+        """
+        self._db().execute(
+            """
+            INSERT INTO watchlist (cin, score, score_at, pinned) VALUES (?, 0, ?, 1)
+            ON CONFLICT(cin) DO UPDATE SET pinned = 1
+            """,
+            (cin.upper(), time.time())
+        )
+
+    def unwatch(self, cin: str):
+        self._db().execute("DELETE FROM watchlist WHERE cin = ?", (cin.upper(),))
+
+    # -------------------------------------------------
+    # Budget
+    # -------------------------------------------------
+    def _take_budget(self) -> bool:
+        """
+        Count one upstream call against today's budget; False when spent.
+        """
+        if self.daily_budget <= 0:
+            return False
+
+        cursor = self._db().execute(
+            """
+            INSERT INTO budget (day, calls) VALUES (?, 1)
+            ON CONFLICT(day) DO UPDATE SET calls = calls + 1 WHERE calls < ?
+            """,
+            (date.today().isoformat(), self.daily_budget)
+        )
+        return cursor.rowcount > 0
+
+    def budget_used(self) -> int:
+        row = self._db().execute(
+            "SELECT calls FROM budget WHERE day = ?",
+            (date.today().isoformat(),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    # -------------------------------------------------
+    # Serving
+    # -------------------------------------------------
+    def get(self, cin: str) -> Dict:
+        """
+        Cached response if there is one (possibly stale, then revalidated
+        in the background), else a normal upstream lookup.
+        """
+        cin = cin.strip()
+        self.record_request(cin)
+
+        entry = self.cache.get_entry(make_key(LOOKUP_TYPE, cin, SCOPE))
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at <= time.time():
+                self.revalidate(cin)
+            return value
+
+        return self.client.fetch_company_data(
+            lookup_type=LOOKUP_TYPE,
+            lookup_value=cin,
+            scope=SCOPE
+        )
+
+    def revalidate(self, cin: str):
+        with self._urgent_lock:
+            self._urgent[cin.upper()] = None
+        self._wakeup.set()
+
+    # -------------------------------------------------
+    # Refreshing
+    # -------------------------------------------------
+    def due(self, limit: int) -> List[str]:
+        """
+        Watched CINs whose cache entry is missing, stale or expiring
+        within `refresh_ahead_seconds`, in priority order.
+        """
+        self.flush_scores()
+
+        now = time.time()
+        rows = self._db().execute(
+            """
+            SELECT cin, score, score_at, last_updated, last_refreshed, pinned
+            FROM watchlist
+            WHERE last_refreshed < ?
+            """,
+            (now - self.refresh_ahead_seconds,)
+        ).fetchall()
+
+        expiries = self.cache.expiries(make_key(LOOKUP_TYPE, row[0], SCOPE) for row in rows)
+
+        ranked = []
+        for cin, score, score_at, last_updated, last_refreshed, pinned in rows:
+            expires_at = expiries.get(make_key(LOOKUP_TYPE, cin, SCOPE))
+            if expires_at is not None and expires_at - now > self.refresh_ahead_seconds:
+                continue
+
+            demand = score * self._decay(now - score_at) + pinned
+            if demand <= 0:
+                continue
+
+            age_days = (now - last_updated) / 86400 if last_updated else 1.0
+            ranked.append((demand * (1 + max(age_days, 0.0)), cin))
+
+        ranked.sort(reverse=True)
+        return [cin for _, cin in ranked[:limit]]
+
+    def _claim(self, cin: str, min_age: float) -> Optional[float]:
+        """
+        Mark a CIN as being refreshed so other workers skip it, unless it
+        was refreshed less than `min_age` seconds ago. Returns the previous
+        `last_refreshed` for `_unclaim`, or None when not claimed.
+        """
+        now = time.time()
+        conn = self._db()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT last_refreshed FROM watchlist WHERE cin = ? AND last_refreshed < ?",
+                (cin, now - min_age)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE watchlist SET last_refreshed = ? WHERE cin = ?", (now, cin))
+        return row[0]
+
+    def _unclaim(self, cin: str, previous: float):
+        """
+        Undo a `_claim` whose refresh fetched nothing, so the CIN stays due.
+        """
+        self._db().execute(
+            "UPDATE watchlist SET last_refreshed = ? WHERE cin = ?",
+            (previous, cin)
+        )
+
+    def refresh(self, cin: str) -> bool:
+        if not self._take_budget():
+            return False
+
+        response = self.client.fetch_company_data(
+            lookup_type=LOOKUP_TYPE,
+            lookup_value=cin,
+            scope=SCOPE,
+            use_cache=False
+        )
+
+        if is_complete_response(response):
+            self._db().execute(
+                "UPDATE watchlist SET last_updated = ? WHERE cin = ?",
+                (parse_last_updated(last_updated_of(response)), cin.upper())
+            )
+        return True
+
+    def run_once(self) -> Dict:
+        """
+        Refresh queued stale CINs, then the highest-priority due ones, up
+        to `batch_size` upstream calls.
+
+        A CIN whose refresh fetched nothing (budget spent, or an error)
+        keeps its old `last_refreshed`, and stale CINs not reached are
+        queued again.
+        """
+        stats = {"refreshed": 0, "failed": 0, "over_budget": False}
+
+        self.flush_scores()
+        urgent = dict(self._take_urgent())
+
+        candidates = list(urgent) + [cin for cin in self.due(self.batch_size) if cin not in urgent]
+
+        try:
+            for cin in candidates:
+                if stats["refreshed"] + stats["failed"] >= self.batch_size:
+                    break
+                # Stale entries someone asked for only wait out one interval
+                min_age = self.interval if cin in urgent else self.refresh_ahead_seconds
+                previous = self._claim(cin, min_age)
+                if previous is None:
+                    urgent.pop(cin, None)
+                    continue
+
+                try:
+                    refreshed = self.refresh(cin)
+                except Exception as e:
+                    self._unclaim(cin, previous)
+                    urgent.pop(cin, None)
+                    stats["failed"] += 1
+                    print(f"[REFRESH SCHEDULER ERROR] {cin}: {e}", file=sys.stderr)
+                    continue
+
+                if not refreshed:
+                    self._unclaim(cin, previous)
+                    stats["over_budget"] = True
+                    break
+                urgent.pop(cin, None)
+                stats["refreshed"] += 1
+        finally:
+            self._requeue_urgent(list(urgent.items()))
+
+        return stats
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            if not self._lead():
+                try:
+                    self.flush_scores()
+                except Exception as e:
+                    print(f"[REFRESH SCHEDULER ERROR] {e}", file=sys.stderr)
+                self._wakeup.wait(self.flush_seconds)
+                self._wakeup.clear()
+                continue
+
+            try:
+                stats = self.run_once()
+            except Exception as e:
+                print(f"[REFRESH SCHEDULER ERROR] {e}", file=sys.stderr)
+                stats = {"over_budget": True}
+
+            # Keep going while there is a backlog and budget left
+            if stats.get("refreshed", 0) < self.batch_size or stats.get("over_budget"):
+                self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._resign()
+        self.flush_scores()
+
+    def stats(self) -> Dict:
+        self.flush_scores()
+        conn = self._db()
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(pinned), 0) FROM watchlist"
+        ).fetchone()
+        return {
+            "watched": row[0],
+            "pinned": row[1],
+            "budget": self.daily_budget,
+            "budget_used": self.budget_used(),
+            "queued": conn.execute("SELECT COUNT(*) FROM urgent").fetchone()[0],
+            "leader": self._leader_file is not None and self._leader_pid == os.getpid()
+        }
+
+
+def main(argv=None):
+    from pipeline.bulk_fetch import build_client, read_cins
+
+    parser = argparse.ArgumentParser(description="Keep watched CINs fresh in the response cache")
+    parser.add_argument("--cache", default="data/cache/insta_responses.sqlite3")
+    parser.add_argument("--watchlist", default="data/scheduler/watchlist.sqlite3")
+    parser.add_argument("--watch", help="File with CINs to pin (one per line)")
+    parser.add_argument("--budget", type=int, default=500, help="Max upstream calls per day")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between passes")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache(path=args.cache)
+    client = build_client()
+    client.cache = cache
+
+    scheduler = RefreshScheduler(
+        client,
+        cache,
+        path=args.watchlist,
+        daily_budget=args.budget,
+        interval=args.interval
+    )
+
+    if args.watch:
+        with open(args.watch, "r") as f:
+            for cin in read_cins(f):
+                scheduler.watch(cin)
+
+    if args.once:
+        print(f"[REFRESH SCHEDULER] {scheduler.run_once()}", file=sys.stderr)
+        return
+
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# pipeline/snapshots.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+# Fields that identify a row inside a list, tried in order, so that
+# reordered director / charge / filing lists are not reported as changed
+IDENTITY_FIELDS = ("DIN", "PAN", "ChargeId", "SRN", "CIN", "Year", "FinancialYear")
+
+# Sections excluded from hashing: the envelope changes on every call
+VOLATILE_SECTIONS = ("Response",)
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def section_hashes(response: Dict) -> Dict[str, str]:
+    """
+    SHA-256 of each top-level section's canonical JSON.
+    """
+    return {
+        name: hashlib.sha256(_canonical(value)).hexdigest()
+        for name, value in response.items()
+        if name not in VOLATILE_SECTIONS
+    }
+
+
+def last_updated_of(response: Dict) -> Optional[str]:
+    master = response.get("CompanyMasterSummary") or {}
+    value = master.get("LastUpdatedDateTime") if isinstance(master, dict) else None
+    return str(value) if value else None
+
+
+def _identity(row: Any) -> Optional[str]:
+    if isinstance(row, dict):
+        for field in IDENTITY_FIELDS:
+            if row.get(field) not in (None, ""):
+                return f"{field}={row[field]}"
+    return None
+
+
+def _keyed(rows: List) -> Optional[Dict[str, Any]]:
+    keyed = {}
+    for row in rows:
+        identity = _identity(row)
+        if identity is None or identity in keyed:
+            return None
+        keyed[identity] = row
+    return keyed
+
+
+def diff_values(old: Any, new: Any, path: str = "") -> List[Dict]:
+    """
+    Structural diff: a list of {"path", "change", "old", "new"} entries,
+    with change one of added / removed / changed. Lists of rows are matched
+    by identity field (e.g. DIN) when every row has one, else by position.
+    """
+    changes: List[Dict] = []
+    stack = [(path, old, new)]
+
+    while stack:
+        path, old, new = stack.pop()
+
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in old.keys() | new.keys():
+                child = f"{path}.{key}" if path else key
+                if key not in new:
+                    changes.append({"path": child, "change": "removed", "old": old[key], "new": None})
+                elif key not in old:
+                    changes.append({"path": child, "change": "added", "old": None, "new": new[key]})
+                elif old[key] != new[key]:
+                    stack.append((child, old[key], new[key]))
+
+        elif isinstance(old, list) and isinstance(new, list):
+            old_rows, new_rows = _keyed(old), _keyed(new)
+            if old_rows is None or new_rows is None:
+                old_rows = {str(i): row for i, row in enumerate(old)}
+                new_rows = {str(i): row for i, row in enumerate(new)}
+
+            for key in old_rows.keys() | new_rows.keys():
+                child = f"{path}[{key}]"
+                if key not in new_rows:
+                    changes.append({"path": child, "change": "removed", "old": old_rows[key], "new": None})
+                elif key not in old_rows:
+                    changes.append({"path": child, "change": "added", "old": None, "new": new_rows[key]})
+                elif old_rows[key] != new_rows[key]:
+                    stack.append((child, old_rows[key], new_rows[key]))
+
+        elif old != new:
+            changes.append({"path": path, "change": "changed", "old": old, "new": new})
+
+    return sorted(changes, key=lambda c: c["path"])
+
+
+class SnapshotStore:
+    """
+    Last stored snapshot of every company, one row per section with its
+    content hash, so a refresh can tell which sections actually changed.
+    """
+
+    def __init__(self, path: str = "data/snapshots/snapshots.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        conn = self._db()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sections (
+                cin TEXT NOT NULL,
+                section TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                content BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (cin, section)
+            );
+            CREATE TABLE IF NOT EXISTS companies (
+                cin TEXT PRIMARY KEY,
+                last_updated TEXT,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+        conn.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def last_updated(self, cin: str) -> Optional[str]:
+        row = self._db().execute(
+            "SELECT last_updated FROM companies WHERE cin = ?",
+            (cin.upper(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def hashes(self, cin: str) -> Dict[str, str]:
+        rows = self._db().execute(
+            "SELECT section, hash FROM sections WHERE cin = ?",
+            (cin.upper(),)
+        ).fetchall()
+        return dict(rows)
+
+    def load_section(self, cin: str, section: str) -> Any:
+        row = self._db().execute(
+            "SELECT content FROM sections WHERE cin = ? AND section = ?",
+            (cin.upper(), section)
+        ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def compare(self, cin: str, response: Dict, detailed: bool = True) -> Dict:
+        """
+        Compare a fresh response against the stored snapshot.
+
+        Returns {"added", "removed", "changed", "reordered"} section
+        lists, plus a per-section structural diff under "details" for
+        changed sections. "reordered" sections hash differently but have
+        no structural change; save them so the next compare skips the diff.
+        """
+        old_hashes = self.hashes(cin)
+        new_hashes = section_hashes(response)
+
+        result = {
+            "added": sorted(new_hashes.keys() - old_hashes.keys()),
+            "removed": sorted(old_hashes.keys() - new_hashes.keys()),
+            "changed": sorted(
+                name for name in new_hashes.keys() & old_hashes.keys()
+                if new_hashes[name] != old_hashes[name]
+            ),
+            "reordered": [],
+            "details": {}
+        }
+
+        if detailed:
+            for name in list(result["changed"]):
+                details = diff_values(self.load_section(cin, name), response[name], name)
+                if details:
+                    result["details"][name] = details
+                else:
+                    # Rows only reordered; nothing to reprocess
+                    result["changed"].remove(name)
+                    result["reordered"].append(name)
+
+        return result
+
+    def save(self, cin: str, response: Dict, only: Optional[List[str]] = None):
+        """
+        Store the response as the new snapshot. `only` limits the write
+        to the given sections (the ones a compare reported as added,
+        changed or reordered).
+        """
+        cin = cin.upper()
+        now = time.time()
+        hashes = section_hashes(response)
+
+        conn = self._db()
+        with conn:
+            current = set(hashes)
+            for name in self.hashes(cin).keys() - current:
+                conn.execute("DELETE FROM sections WHERE cin = ? AND section = ?", (cin, name))
+
+            for name, digest in hashes.items():
+                if only is not None and name not in only:
+                    continue
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO sections (cin, section, hash, content, stored_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (cin, name, digest, zlib.compress(_canonical(response[name])), now)
+                )
+
+            conn.execute(
+                "INSERT OR REPLACE INTO companies (cin, last_updated, fetched_at) VALUES (?, ?, ?)",
+                (cin, last_updated_of(response), now)
+            )
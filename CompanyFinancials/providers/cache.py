@@ -0,0 +1,255 @@
+# providers/cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from common import metrics
+
+CACHE_LOOKUPS = metrics.counter(
+    "response_cache_lookups_total",
+    "Response cache lookups by result (memory_hit, disk_hit, miss)",
+    ("result",)
+)
+
+
+def make_key(lookup_type: str, lookup_value: str, scope: str = "All") -> str:
+    """
+    Build the cache key for a provider lookup.
+    CINs are case-insensitive, so the value is upper-cased.
+    """
+    return f"{lookup_type}/{lookup_value.strip().upper()}/{scope}"
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: an in-process LRU in front of a SQLite file.
+
+    Every entry carries its own expiry time. The memory tier holds at most
+    `max_memory_entries` responses, the disk tier at most `max_disk_entries`;
+    the least recently used entries are evicted first.
+
+    Expired disk entries are kept for another `stale_seconds` so callers
+    can serve them while a refresh is in flight (see `get_entry`).
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache/insta_responses.sqlite3",
+        ttl_seconds: int = 24 * 60 * 60,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        stale_seconds: int = 7 * 24 * 60 * 60
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.stale_seconds = stale_seconds
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -------------------------------------------------
+    # Disk tier
+    # -------------------------------------------------
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily and per process: gunicorn workers forked from a
+        # preloaded app each get their own connection to the same file
+        if self._conn is None or self._conn_pid != os.getpid():
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Read through the shared page cache instead of per-process buffers
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed "
+                "ON responses (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+
+        return self._conn
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        now = time.time()
+        conn.execute(
+            "DELETE FROM responses WHERE expires_at <= ?",
+            (now - self.stale_seconds,)
+        )
+
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_disk_entries
+
+        if overflow > 0:
+            conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
+
+    # -------------------------------------------------
+    # Memory tier
+    # -------------------------------------------------
+    def _remember(self, key: str, expires_at: float, value: Dict):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    CACHE_LOOKUPS.inc(result="memory_hit")
+                    return value
+                del self._memory[key]
+
+            conn = self._db()
+            row = conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key)
+            )
+            conn.commit()
+
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.disk_hits += 1
+            CACHE_LOOKUPS.inc(result="disk_hit")
+            return value
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """
+        Return (value, expires_at) even if the entry has expired, as long
+        as it is still within the stale window. Does not count as a hit.
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[1], entry[0]
+
+            row = self._db().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+        if row is None or row[1] <= now - self.stale_seconds:
+            return None
+
+        return json.loads(row[0]), row[1]
+
+    def expiries(self, keys: Iterable[str]) -> Dict[str, float]:
+        """
+        expires_at of every stored key in `keys`, without decoding the
+        values. Keys past the stale window are left out.
+        """
+        keys = list(keys)
+        cutoff = time.time() - self.stale_seconds
+        expiries: Dict[str, float] = {}
+
+        with self._lock:
+            conn = self._db()
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, expires_at FROM responses WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                expiries.update((key, expires_at) for key, expires_at in rows if expires_at > cutoff)
+
+        return expiries
+
+    def set(self, key: str, value: Dict, ttl_seconds: Optional[int] = None):
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+
+            conn = self._db()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, json.dumps(value), expires_at, now)
+            )
+            self._evict_disk(conn)
+            conn.commit()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            conn = self._db()
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (hits / total) if total else 0.0,
+                "memory_entries": len(self._memory)
+            }
@@ -1,23 +1,79 @@
 # providers/instafinancials.py
 
-import requests
 from typing import Dict, Optional
 
+from common import transport
+from providers.cache import ResponseCache, make_key
+from providers.singleflight import SingleFlight
+
+
+def is_complete_response(data: Dict) -> bool:
+    """
+    True when the response carries company sections, not just the
+    `Response` envelope the provider returns for webhook-delivered lookups.
+    """
+    return isinstance(data, dict) and any(key != "Response" for key in data)
+
+
+def request_id_of(payload: Dict) -> Optional[str]:
+    """
+    Return Response.RequestId from a provider response or webhook payload.
+    """
+    if not isinstance(payload, dict):
+        return None
+    request_id = (payload.get("Response") or {}).get("RequestId")
+    return str(request_id) if request_id else None
+
+
 class InstaFinancialsClient:
     def __init__(
         self,
         api_key: str,
-        base_url: str = "https://instafinancials.com/api/InstaBasic/v1/json"
+        base_url: str = "https://instafinancials.com/api/InstaBasic/v1/json",
+        cache: Optional[ResponseCache] = None,
+        singleflight: Optional[SingleFlight] = None
     ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
+        self.cache = cache
+        self.singleflight = singleflight
 
     def fetch_company_data(
         self,
         lookup_type: str,
         lookup_value: str,
         scope: str = "All",
-        webhook_url: Optional[str] = None
+        webhook_url: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Dict:
+        """
+        Look up a company. With `use_cache=False` the cached copy is
+        ignored, also by the cross-process single-flight, and the fresh
+        response replaces it.
+        """
+        key = make_key(lookup_type, lookup_value, scope)
+
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        def fetch():
+            return self._fetch_upstream(key, lookup_type, lookup_value, scope, webhook_url)
+
+        # Concurrent identical lookups share one upstream call
+        if self.singleflight is not None:
+            return self.singleflight.do(key, fetch, force=not use_cache)
+
+        return fetch()
+
+    def _fetch_upstream(
+        self,
+        key: str,
+        lookup_type: str,
+        lookup_value: str,
+        scope: str,
+        webhook_url: Optional[str]
     ) -> Dict:
         headers = {
             "Accept": "application/json",
@@ -29,6 +85,13 @@ class InstaFinancialsClient:
 
         url = f"{self.base_url}/{lookup_type}/{lookup_value}/{scope}"
 
-        response = requests.get(url, headers=headers, timeout=30)
+        # Paid lookup: never retried once InstaFinancials may have served it
+        response = transport.get(url, headers=headers, timeout=30, endpoint=f"{lookup_type}/{scope}", billed=True)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+
+        # Webhook acknowledgements are not cached; the payload arrives later
+        if self.cache is not None and is_complete_response(data):
+            self.cache.set(key, data)
+
+        return data
@@ -0,0 +1,165 @@
+# providers/instafinancials_async.py
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from providers.cache import ResponseCache, make_key
+from providers.instafinancials import is_complete_response
+from common.transport import UPSTREAM_SECONDS
+
+
+class AsyncInstaFinancialsClient:
+    """
+    asyncio counterpart of InstaFinancialsClient.
+
+    One aiohttp session is shared by all calls; `max_concurrency` bounds both
+    the connector pool and the number of in-flight lookups. The response
+    cache is SQLite-backed, so its reads and writes run on the loop's
+    default executor instead of blocking the event loop.
+
+        async with AsyncInstaFinancialsClient(api_key) as client:
+            data = await client.fetch_company_data("CompanyCIN", cin)
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://instafinancials.com/api/InstaBasic/v1/json",
+        cache: Optional[ResponseCache] = None,
+        max_concurrency: int = 20,
+        timeout: float = 30
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.max_concurrency
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_company_data(
+        self,
+        lookup_type: str,
+        lookup_value: str,
+        scope: str = "All",
+        webhook_url: Optional[str] = None
+    ) -> Dict:
+        loop = asyncio.get_running_loop()
+        key = make_key(lookup_type, lookup_value, scope)
+
+        if self.cache is not None:
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        headers = {
+            "Accept": "application/json",
+            "user-key": self.api_key
+        }
+
+        if webhook_url:
+            headers["Webhook"] = webhook_url
+
+        url = f"{self.base_url}/{lookup_type}/{lookup_value}/{scope}"
+
+        session = self._get_session()
+        async with self._semaphore:
+            start = time.perf_counter()
+            async with session.get(url, headers=headers) as response:
+                UPSTREAM_SECONDS.observe(
+                    time.perf_counter() - start,
+                    provider=urlsplit(url).hostname or "",
+                    endpoint=f"{lookup_type}/{scope}",
+                    status=str(response.status)
+                )
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+        # Webhook acknowledgements carry no company data
+        if self.cache is not None and is_complete_response(data):
+            await loop.run_in_executor(None, self.cache.set, key, data)
+
+        return data
+
+    async def fetch_many(
+        self,
+        cins: Iterable[str],
+        scope: str = "All",
+        webhook_url: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Union[Dict, Exception]]]:
+        """
+        Look up many CINs concurrently and yield `(cin, result)` pairs in
+        completion order. A failed lookup yields its exception instead of
+        aborting the batch.
+
+        `max_concurrency` workers pull CINs from `cins` as they go, and
+        finished results wait in a queue of the same size, so neither the
+        input nor the output is held in memory all at once.
+        """
+        cins = iter(cins)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+
+        async def worker():
+            try:
+                for cin in cins:
+                    try:
+                        result = await self.fetch_company_data(
+                            lookup_type="CompanyCIN",
+                            lookup_value=cin,
+                            scope=scope,
+                            webhook_url=webhook_url
+                        )
+                    except Exception as e:
+                        result = e
+                    await results.put((cin, result))
+            except Exception as e:
+                # The input itself failed; re-raised by fetch_many
+                await results.put(e)
+                return
+            await results.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.max_concurrency)]
+        running = len(workers)
+
+        try:
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
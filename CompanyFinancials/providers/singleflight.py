@@ -0,0 +1,103 @@
+# providers/singleflight.py
+
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from providers.cache import ResponseCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process variant is available
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside one process.
+
+    The first caller runs `fn`; callers arriving while it is in flight block
+    and receive the same result, or the same exception. `force` only
+    matters to subclasses that may answer from a cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], force: bool = False) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+class FileLockSingleFlight(SingleFlight):
+    """
+    Coalesces identical calls across processes (e.g. gunicorn workers).
+
+    Calls are first coalesced in-process, then serialised across processes
+    with an flock on a per-key lock file. A process that waited on the lock
+    re-checks the shared response cache before calling upstream, so it picks
+    up the result the lock holder just stored; `force=True` (refreshes)
+    skips that re-check. Errors are not shared across processes; the next
+    waiter simply retries.
+    """
+
+    def __init__(self, lock_dir: str = "data/locks", cache: Optional[ResponseCache] = None):
+        if fcntl is None:
+            raise RuntimeError("FileLockSingleFlight requires fcntl (POSIX only)")
+
+        super().__init__()
+        self.lock_dir = lock_dir
+        self.cache = cache
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.lock_dir, f"{digest}.lock")
+
+    def do(self, key: str, fn: Callable[[], Any], force: bool = False) -> Any:
+        # Forced calls must not join a call that may answer from the cache
+        flight_key = f"{key}\0force" if force else key
+        return super().do(flight_key, lambda: self._locked(key, fn, force))
+
+    def _locked(self, key: str, fn: Callable[[], Any], force: bool = False) -> Any:
+        with open(self._lock_path(key), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self.cache is not None and not force:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        return cached
+                return fn()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,415 @@
+# search/company_index.py
+
+import heapq
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+NAME_FIELDS = ("CompanyName", "Name")
+CIN_FIELDS = ("CompanyCIN", "CIN")
+
+TOKEN_RE = re.compile(r"[A-Z0-9]+")
+
+# Bounds the work per query token on very short prefixes
+MAX_CANDIDATES = 5000
+
+# Suffixes too common to help ranking
+STOP_TOKENS = {"LTD", "LIMITED", "PVT", "PRIVATE", "THE", "AND", "OF", "INDIA"}
+
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.upper())
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {' '.join(_tokens(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.keys: Set[str] = set()
+
+
+class _Trie:
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, word: str, key: str):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        node.keys.add(key)
+
+    def remove(self, word: str, key: str):
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return
+        node.keys.discard(key)
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> Set[str]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+
+        found: Set[str] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            found.update(node.keys)
+            if limit is not None and len(found) >= limit:
+                break
+            stack.extend(node.children.values())
+        return found
+
+
+class CompanySearchIndex:
+    """
+    Local autocomplete over companies we already know about.
+
+    Entries come from fetched InstaFinancials responses and from
+    esg.listed_companies. They are persisted in SQLite and served from
+    in-memory structures: a trie over CINs and symbols, a trie over name
+    tokens for prefix matching, and a trigram index for fuzzy names.
+    Entries added by other workers are picked up every `reload_interval`
+    seconds, by a sequence number each write takes inside its SQLite
+    write transaction: unlike a wall-clock watermark, it can never let a
+    slower concurrent writer's rows fall behind what was already loaded.
+
+    Listed companies without a CIN are kept under their listing id
+    (`<exchange>:<symbol>`); searches leave them out unless asked for,
+    since the lookup page needs a CIN.
+    """
+
+    def __init__(self, path: str = "data/search/companies.sqlite3", reload_interval: float = 30.0):
+        self.path = path
+        self.reload_interval = reload_interval
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+        self._entries: Dict[str, Dict] = {}
+        self._id_trie = _Trie()
+        self._token_trie = _Trie()
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self._loaded_seq = 0
+        self._last_reload = 0.0
+
+        self.reload()
+        # Built before fork (preload_app): keep the loaded entries but no
+        # SQLite handle; each process reopens its own on first use
+        self._close()
+
+    def _db(self) -> sqlite3.Connection:
+        # Reopened after fork; the in-memory index itself is inherited
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS companies (
+                    key TEXT PRIMARY KEY,
+                    cin TEXT,
+                    name TEXT,
+                    symbol TEXT,
+                    isin TEXT,
+                    source TEXT,
+                    updated_at REAL NOT NULL,
+                    seq INTEGER
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(companies)")}
+            if "seq" not in columns:
+                conn.execute("ALTER TABLE companies ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE companies SET seq = rowid")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_companies_updated ON companies (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_companies_seq ON companies (seq)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._conn_pid = None
+
+    # -------------------------------------------------
+    # In-memory structures
+    # -------------------------------------------------
+    def _unindex_entry(self, entry: Dict):
+        key = entry["key"]
+
+        for identifier in (entry.get("cin"), entry.get("symbol"), entry.get("isin")):
+            if identifier:
+                self._id_trie.remove(identifier.upper(), key)
+
+        name = entry.get("name") or ""
+        for token in _tokens(name):
+            self._token_trie.remove(token, key)
+        for gram in _trigrams(name):
+            self._trigrams.get(gram, set()).discard(key)
+
+    def _index_entry(self, entry: Dict):
+        key = entry["key"]
+        previous = self._entries.get(key)
+        if previous == entry:
+            return
+        if previous is not None:
+            self._unindex_entry(previous)
+
+        self._entries[key] = entry
+
+        for identifier in (entry.get("cin"), entry.get("symbol"), entry.get("isin")):
+            if identifier:
+                self._id_trie.add(identifier.upper(), key)
+
+        name = entry.get("name") or ""
+        grams = _trigrams(name)
+        for token in _tokens(name):
+            self._token_trie.add(token, key)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(key)
+        self._gram_counts[key] = len(grams)
+
+    def reload(self, max_age: Optional[float] = None):
+        """
+        Load entries written since the last reload (by any process);
+        with `max_age`, only if the last reload is older than that.
+        """
+        with self._lock:
+            if max_age is not None and time.monotonic() - self._last_reload <= max_age:
+                return
+
+            rows = self._db().execute(
+                """
+                SELECT key, cin, name, symbol, isin, source, seq
+                FROM companies WHERE seq > ? ORDER BY seq
+                """,
+                (self._loaded_seq,)
+            ).fetchall()
+
+            for key, cin, name, symbol, isin, source, seq in rows:
+                self._index_entry({
+                    "key": key, "cin": cin, "name": name,
+                    "symbol": symbol, "isin": isin, "source": source
+                })
+                self._loaded_seq = max(self._loaded_seq, seq)
+
+            self._last_reload = time.monotonic()
+
+    # -------------------------------------------------
+    # Updates
+    # -------------------------------------------------
+    def add(
+        self,
+        cin: Optional[str] = None,
+        name: Optional[str] = None,
+        symbol: Optional[str] = None,
+        isin: Optional[str] = None,
+        source: str = "insta"
+    ):
+        self.add_many([{"cin": cin, "name": name, "symbol": symbol, "isin": isin, "source": source}])
+
+    def add_many(self, companies: Iterable[Dict]):
+        now = time.time()
+        rows = []
+
+        with self._lock:
+            for company in companies:
+                cin = (company.get("cin") or "").upper() or None
+                symbol = (company.get("symbol") or "").upper() or None
+                # CIN, else the listing id
+                key = cin or (f"{company.get('source', '')}:{symbol}" if symbol else None)
+                if key is None:
+                    continue
+
+                entry = {
+                    "key": key,
+                    "cin": cin,
+                    "name": company.get("name"),
+                    "symbol": symbol,
+                    "isin": company.get("isin"),
+                    "source": company.get("source")
+                }
+                if self._entries.get(key) == entry:
+                    continue
+
+                self._index_entry(entry)
+                rows.append((key, cin, entry["name"], symbol, entry["isin"], entry["source"], now))
+
+            if rows:
+                conn = self._db()
+                # Sequence numbers are taken under the write lock, so they
+                # become visible to readers in order
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    base = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM companies").fetchone()[0]
+                    conn.executemany(
+                        """
+                        INSERT OR REPLACE INTO companies (key, cin, name, symbol, isin, source, updated_at, seq)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        [row + (base + i,) for i, row in enumerate(rows, 1)]
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+    def add_response(self, cin: str, response: Dict):
+        """
+        Index a fetched InstaFinancials response.
+        """
+        master = response.get("CompanyMasterSummary") if isinstance(response, dict) else None
+        if not isinstance(master, dict):
+            return
+
+        name = next((master[f] for f in NAME_FIELDS if master.get(f)), None)
+        cin = next((master[f] for f in CIN_FIELDS if master.get(f)), cin)
+        self.add(cin=cin, name=name, source="insta")
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def _rank(self, keys: Iterable[str], limit: int) -> List[str]:
+        # Shortest names first: the closest to what was typed
+        return heapq.nsmallest(
+            limit,
+            keys,
+            key=lambda k: (len(self._entries[k].get("name") or ""), k)
+        )
+
+    def search(self, query: str, limit: int = 10, require_cin: bool = False) -> List[Dict]:
+        """
+        Identifier prefix matches first, then name-token prefix matches,
+        then fuzzy (trigram) name matches.
+
+        Each result's "lookup" is "cin" when its CIN is known, else
+        "symbol": a listed company (esg.listed_companies) not fetched yet,
+        which cannot be looked up by CIN. `require_cin` leaves those out.
+        """
+        self.reload(max_age=self.reload_interval)
+
+        tokens = _tokens(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            results: List[str] = []
+            seen: Set[str] = set()
+
+            def usable(keys: Iterable[str]) -> Iterable[str]:
+                if not require_cin:
+                    return keys
+                return (key for key in keys if self._entries[key].get("cin"))
+
+            def take(keys: Iterable[str]):
+                for key in keys:
+                    if key not in seen and len(results) < limit:
+                        seen.add(key)
+                        results.append(key)
+
+            compact = "".join(tokens)
+            if len(tokens) == 1:
+                take(self._rank(usable(self._id_trie.prefix(compact, MAX_CANDIDATES)), limit))
+
+            if len(results) < limit:
+                matches: Optional[Set[str]] = None
+                for token in tokens:
+                    if token in STOP_TOKENS and len(tokens) > 1:
+                        continue
+                    keys = self._token_trie.prefix(token, MAX_CANDIDATES)
+                    matches = keys if matches is None else (matches & keys)
+                    if not matches:
+                        break
+
+                if matches:
+                    take(self._rank(usable(matches), limit))
+
+            # Typo tolerance only when nothing matched by prefix
+            if not results:
+                take(usable(self._fuzzy(query, len(self._entries))))
+
+            return [
+                dict(self._entries[key], lookup="cin" if self._entries[key].get("cin") else "symbol")
+                for key in results
+            ]
+
+    def _fuzzy(self, query: str, limit: int, threshold: float = 0.5) -> List[str]:
+        grams = _trigrams(query)
+        if not grams:
+            return []
+
+        counts: Dict[str, int] = {}
+        for gram in grams:
+            postings = self._trigrams.get(gram, ())
+            # Very common trigrams say little and dominate the cost
+            if len(postings) > MAX_CANDIDATES:
+                continue
+            for key in postings:
+                counts[key] = counts.get(key, 0) + 1
+
+        scored = []
+        for key, shared in counts.items():
+            # Share of the query found in the name, ties broken by Jaccard
+            coverage = shared / len(grams)
+            if coverage >= threshold:
+                jaccard = shared / (len(grams) + self._gram_counts[key] - shared)
+                scored.append((-coverage, -jaccard, key))
+
+        return [key for _, _, key in sorted(scored)[:limit]]
+
+
+def load_listed_companies(index: CompanySearchIndex, database_url: str) -> int:
+    """
+    Copy active rows of esg.listed_companies into the index.
+    """
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            """
+            SELECT symbol, company_name, isin, exchange
+            FROM esg.listed_companies
+            WHERE is_active IS NOT FALSE
+            """
+        )).fetchall()
+
+    index.add_many(
+        {"symbol": symbol, "name": name, "isin": isin, "source": (exchange or "NSE").lower()}
+        for symbol, name, isin, exchange in rows
+    )
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync esg.listed_companies into the search index")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--index", default="data/search/companies.sqlite3")
+    args = parser.parse_args()
+
+    count = load_listed_companies(CompanySearchIndex(args.index), args.database_url)
+    print(f"[SEARCH INDEX] listed companies loaded: {count}")
@@ -0,0 +1,358 @@
+# storage/payload_log.py
+
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from providers.instafinancials import request_id_of
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process writers only
+    fcntl = None
+
+
+# Record framing: body length, CRC32 of body, then the zlib-compressed JSON
+HEADER = struct.Struct(">II")
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+
+CIN_FIELDS = ("CompanyCIN", "CIN", "Cin")
+
+
+def extract_cin(payload: Dict) -> Optional[str]:
+    """
+    Best-effort CIN from a provider payload, for the index.
+    """
+    if not isinstance(payload, dict):
+        return None
+
+    for section in ("CompanyMasterSummary", "Response"):
+        values = payload.get(section) or {}
+        if isinstance(values, dict):
+            for field in CIN_FIELDS:
+                if values.get(field):
+                    return str(values[field]).upper()
+
+    return None
+
+
+class PayloadLog:
+    """
+    Append-only, segmented log of webhook payloads.
+
+    Payloads are appended as compressed, CRC-checked records to numbered
+    segment files that roll over at `max_segment_bytes`. Writes are made
+    durable in groups: fsync runs once per `group_commit_size` records or
+    every `sync_interval` seconds, whichever comes first, and the SQLite
+    index (by CIN and RequestId) is committed only after the fsync, so it
+    never points at unsynced bytes. On open, records left unindexed by a
+    crash are re-indexed and torn tail records are truncated, in every
+    segment: another process may have rolled over past a segment whose
+    last records it never indexed. Index entries past the end of a
+    truncated segment are dropped.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data/webhook_log",
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        group_commit_size: int = 64,
+        sync_interval: float = 1.0,
+        compress_level: int = 6
+    ):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.group_commit_size = group_commit_size
+        self.sync_interval = sync_interval
+        self.compress_level = compress_level
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"),
+            check_same_thread=False,
+            timeout=30
+        )
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS payloads (
+                id INTEGER PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                cin TEXT,
+                request_id TEXT,
+                received_at REAL NOT NULL,
+                UNIQUE (segment, offset)
+            );
+            CREATE INDEX IF NOT EXISTS idx_payloads_cin ON payloads (cin);
+            CREATE INDEX IF NOT EXISTS idx_payloads_request_id ON payloads (request_id);
+            """
+        )
+        self._index.commit()
+
+        self._segment: Optional[int] = None
+        self._file = None
+        self._pending: List[Tuple] = []
+        self._last_sync = time.monotonic()
+        self._closed = threading.Event()
+
+        with self._lock, self._file_lock():
+            self._recover()
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="payload-log-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+
+    # -------------------------------------------------
+    # Segments
+    # -------------------------------------------------
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(numbers)
+
+    def _open_segment(self, segment: int):
+        if self._file is not None:
+            self._file.close()
+        self._segment = segment
+        self._file = open(self._segment_path(segment), "ab")
+
+    def _writable_segment(self):
+        if self._file is None:
+            existing = self.segments()
+            self._open_segment(existing[-1] if existing else 1)
+
+        if os.fstat(self._file.fileno()).st_size >= self.max_segment_bytes:
+            self._sync()
+
+            # Another process may already have rolled over
+            latest = self.segments()[-1]
+            if latest > self._segment and os.path.getsize(self._segment_path(latest)) < self.max_segment_bytes:
+                self._open_segment(latest)
+            else:
+                self._open_segment(max(latest, self._segment) + 1)
+
+    @contextmanager
+    def _file_lock(self):
+        # Serialises appends between processes sharing the directory
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(self.directory, "log.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # -------------------------------------------------
+    # Recovery
+    # -------------------------------------------------
+    def _recover(self):
+        existing = self.segments()
+        if not existing:
+            return
+
+        # Where each segment's indexed records end
+        indexed = dict(self._index.execute(
+            "SELECT segment, MAX(offset + length) FROM payloads GROUP BY segment"
+        ).fetchall())
+
+        rows = []
+
+        for segment in existing:
+            path = self._segment_path(segment)
+            start = indexed.get(segment) or 0
+            size = os.path.getsize(path)
+
+            if size < start:
+                # The segment lost indexed bytes (truncated after the sync):
+                # drop the entries that point past its end
+                self._index.execute(
+                    "DELETE FROM payloads WHERE segment = ? AND offset + length > ?",
+                    (segment, size)
+                )
+                start = self._index.execute(
+                    "SELECT COALESCE(MAX(offset + length), 0) FROM payloads WHERE segment = ?",
+                    (segment,)
+                ).fetchone()[0]
+                self._index.commit()
+
+            if size <= start:
+                continue
+
+            valid_end = start
+            with open(path, "rb") as f:
+                f.seek(start)
+                for offset, length, payload in self._scan(f):
+                    rows.append(self._index_row(segment, offset, length, payload, os.path.getmtime(path)))
+                    valid_end = offset + length
+
+            if os.path.getsize(path) > valid_end:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+
+        if rows:
+            self._index.executemany(
+                """
+                INSERT OR IGNORE INTO payloads (segment, offset, length, cin, request_id, received_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            self._index.commit()
+
+    def _index_row(self, segment: int, offset: int, length: int, payload: Dict, received_at: float) -> Tuple:
+        return (
+            segment,
+            offset,
+            length,
+            extract_cin(payload),
+            request_id_of(payload),
+            received_at
+        )
+
+    # -------------------------------------------------
+    # Writing
+    # -------------------------------------------------
+    def append(self, payload: Dict) -> Tuple[int, int]:
+        """
+        Append one payload; returns its (segment, offset).
+        """
+        body = zlib.compress(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            self.compress_level
+        )
+        record = HEADER.pack(len(body), zlib.crc32(body)) + body
+
+        with self._lock:
+            with self._file_lock():
+                self._writable_segment()
+                offset = os.fstat(self._file.fileno()).st_size
+                self._file.write(record)
+                self._file.flush()
+
+            self._pending.append(
+                self._index_row(self._segment, offset, len(record), payload, time.time())
+            )
+
+            if len(self._pending) >= self.group_commit_size:
+                self._sync()
+
+            return self._segment, offset
+
+    def _sync(self):
+        if not self._pending or self._file is None:
+            return
+
+        os.fsync(self._file.fileno())
+
+        self._index.executemany(
+            """
+            INSERT OR IGNORE INTO payloads (segment, offset, length, cin, request_id, received_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            self._pending
+        )
+        self._index.commit()
+
+        self._pending = []
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.sync_interval):
+            with self._lock:
+                if self._pending and time.monotonic() - self._last_sync >= self.sync_interval:
+                    self._sync()
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._index.close()
+
+    # -------------------------------------------------
+    # Reading
+    # -------------------------------------------------
+    def _scan(self, f) -> Iterator[Tuple[int, int, Dict]]:
+        while True:
+            offset = f.tell()
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+
+            length, crc = HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+
+            yield offset, HEADER.size + length, json.loads(zlib.decompress(body))
+
+    def read(self, segment: int, offset: int) -> Dict:
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            length, crc = HEADER.unpack(f.read(HEADER.size))
+            body = f.read(length)
+
+        if zlib.crc32(body) != crc:
+            raise ValueError(f"Corrupt record at segment {segment} offset {offset}")
+
+        return json.loads(zlib.decompress(body))
+
+    def get_by_request_id(self, request_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._index.execute(
+                "SELECT segment, offset FROM payloads WHERE request_id = ? ORDER BY id DESC LIMIT 1",
+                (request_id,)
+            ).fetchone()
+        return self.read(*row) if row else None
+
+    def find_by_cin(self, cin: str, limit: int = 10) -> List[Dict]:
+        """
+        Most recent payloads for a CIN, newest first.
+        """
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT segment, offset FROM payloads WHERE cin = ? ORDER BY id DESC LIMIT ?",
+                (cin.upper(), limit)
+            ).fetchall()
+        return [self.read(segment, offset) for segment, offset in rows]
+
+    def replay(self, from_segment: int = 0) -> Iterator[Tuple[int, int, Dict]]:
+        """
+        Yield (segment, offset, payload) for every record, oldest first,
+        reading one record at a time.
+        """
+        for segment in self.segments():
+            if segment < from_segment:
+                continue
+            with open(self._segment_path(segment), "rb") as f:
+                for offset, _, payload in self._scan(f):
+                    yield segment, offset, payload
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import each other as top-level packages (web.*, providers.*),
+# and the shared `common` package from the repository root
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(PROJECT))
+sys.path.insert(0, PROJECT)
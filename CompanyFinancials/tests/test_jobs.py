@@ -0,0 +1,73 @@
+import pytest
+
+import webhook_server
+from providers.cache import make_key
+from web import app as web_app
+from web.jobs import JobStore
+from web.settings import load_settings
+
+
+def _payload(request_id):
+    return {"Response": {"Status": "Success", "RequestId": request_id}, "CompanyMasterSummary": {}}
+
+
+def test_webhook_completes_every_job_sharing_a_request_id(tmp_path):
+    store = JobStore(path=str(tmp_path / "jobs.sqlite3"))
+
+    first = store.create("CompanyCIN", "L12345MH2000PLC000001")
+    second = store.create("CompanyCIN", "L12345MH2000PLC000001")
+    store.attach_request_id(first, "req-1")
+    store.attach_request_id(second, "req-1")
+
+    completed = store.complete_by_request_id("req-1", _payload("req-1"))
+
+    assert sorted(job["job_id"] for job in completed) == sorted([first, second])
+    assert store.get(first)["status"] == "done"
+    assert store.get(second)["status"] == "done"
+
+
+def test_parked_webhook_is_claimed_by_every_late_job(tmp_path):
+    store = JobStore(path=str(tmp_path / "jobs.sqlite3"))
+
+    first = store.create("CompanyCIN", "L12345MH2000PLC000001")
+    second = store.create("CompanyCIN", "L12345MH2000PLC000001")
+
+    assert store.complete_by_request_id("req-2", _payload("req-2")) == []
+
+    assert store.attach_request_id(first, "req-2")["status"] == "done"
+    assert store.attach_request_id(second, "req-2")["status"] == "done"
+
+
+def _settings(tmp_path):
+    settings = load_settings(config_path=str(tmp_path / "missing.yaml"))
+    for name in ("cache_path", "jobs_db_path", "search_index_path", "scheduler_path"):
+        settings[name] = str(tmp_path / f"{name}.sqlite3")
+    return settings
+
+
+@pytest.mark.parametrize("receiver", ["web", "webhook_server"])
+def test_both_receivers_fill_the_cache_and_search_index(tmp_path, receiver):
+    settings = _settings(tmp_path)
+    if receiver == "web":
+        app = web_app.create_app(settings, start_background=False)
+    else:
+        app = webhook_server.create_app(output_dir=str(tmp_path / "log"), settings=settings)
+
+    cin = "L12345MH2000PLC000001"
+    store = app.extensions["job_store"]
+    job_id = store.create("CompanyCIN", cin)
+    store.attach_request_id(job_id, "req-3")
+
+    payload = _payload("req-3")
+    payload["CompanyMasterSummary"] = {"CompanyCIN": cin, "CompanyName": "Example Industries Ltd"}
+
+    try:
+        response = app.test_client().post("/webhook/insta", json=payload)
+
+        assert response.status_code == 200
+        assert store.get(job_id)["status"] == "done"
+        assert app.extensions["response_cache"].get(make_key("CompanyCIN", cin)) == payload
+        assert app.extensions["search_index"].search("Example", limit=1)[0]["cin"] == cin
+    finally:
+        if "payload_log" in app.extensions:
+            app.extensions["payload_log"].close()
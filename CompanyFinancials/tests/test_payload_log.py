@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+from storage.payload_log import PayloadLog
+
+
+def _payload(n):
+    return {
+        "Response": {"Status": "Success", "RequestId": f"req-{n}"},
+        "CompanyMasterSummary": {"CompanyCIN": f"L00000MH2000PLC{n:06d}", "Filler": "x" * 200}
+    }
+
+
+def _open(directory, **kwargs):
+    # No background flush during a test; syncs happen where the test says
+    kwargs.setdefault("sync_interval", 3600)
+    return PayloadLog(directory=str(directory), **kwargs)
+
+
+def _request_ids(log):
+    return [payload["Response"]["RequestId"] for _, _, payload in log.replay()]
+
+
+def test_torn_tail_is_truncated_and_earlier_records_survive(tmp_path):
+    log = _open(tmp_path)
+    for n in range(5):
+        log.append(_payload(n))
+    last_segment, last_offset = log.append(_payload(5))
+    log.close()
+
+    path = log._segment_path(last_segment)
+    # Cut the last record partway through its body
+    with open(path, "r+b") as f:
+        f.truncate(last_offset + 20)
+
+    log = _open(tmp_path)
+    try:
+        assert os.path.getsize(path) == last_offset
+        assert _request_ids(log) == [f"req-{n}" for n in range(5)]
+        assert log.get_by_request_id("req-4")["Response"]["RequestId"] == "req-4"
+        assert log.get_by_request_id("req-5") is None
+
+        log.append(_payload(6))
+        log.sync()
+        assert _request_ids(log)[-1] == "req-6"
+        assert log.get_by_request_id("req-6") is not None
+    finally:
+        log.close()
+
+
+def test_corrupt_record_ends_the_segment(tmp_path):
+    log = _open(tmp_path)
+    log.append(_payload(0))
+    segment, offset = log.append(_payload(1))
+    log.close()
+
+    # Flip a byte inside the last record's body, failing its CRC
+    with open(log._segment_path(segment), "r+b") as f:
+        f.seek(offset + 12)
+        byte = f.read(1)
+        f.seek(offset + 12)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    log = _open(tmp_path)
+    try:
+        assert _request_ids(log) == ["req-0"]
+    finally:
+        log.close()
+
+
+def test_unindexed_records_are_recovered_in_every_segment(tmp_path):
+    crashed = _open(tmp_path, max_segment_bytes=600, group_commit_size=1000)
+    for n in range(8):
+        segment, _ = crashed.append(_payload(n))
+    # No sync or close: the last segment's records are not in the index
+    assert len(crashed.segments()) > 1
+
+    # Nor are the first segment's, as when a second writer rolled over past
+    # a segment whose writer crashed
+    index = sqlite3.connect(os.path.join(str(tmp_path), "index.sqlite3"))
+    index.execute("DELETE FROM payloads WHERE segment = ?", (crashed.segments()[0],))
+    index.commit()
+    index.close()
+
+    # ...and the last one is torn
+    path = crashed._segment_path(segment)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+
+    log = _open(tmp_path, max_segment_bytes=600)
+    try:
+        assert _request_ids(log) == [f"req-{n}" for n in range(7)]
+        assert log.get_by_request_id("req-7") is None
+        for n in range(7):
+            assert log.get_by_request_id(f"req-{n}")["Response"]["RequestId"] == f"req-{n}"
+        assert log.find_by_cin("l00000mh2000plc000003")[0]["Response"]["RequestId"] == "req-3"
+    finally:
+        log.close()
+        crashed._closed.set()
+
+
+def test_group_commit_indexes_only_after_sync(tmp_path):
+    log = _open(tmp_path, group_commit_size=3)
+    try:
+        log.append(_payload(0))
+        log.append(_payload(1))
+        assert log.get_by_request_id("req-0") is None
+
+        log.append(_payload(2))
+        assert log.get_by_request_id("req-0") is not None
+        assert log.get_by_request_id("req-2") is not None
+    finally:
+        log.close()
@@ -0,0 +1,68 @@
+import sqlite3
+
+from pipeline.refresh_scheduler import RefreshScheduler
+from providers.cache import ResponseCache
+
+
+class _Client:
+    def __init__(self):
+        self.calls = []
+
+    def fetch_company_data(self, lookup_type, lookup_value, scope, use_cache=True, webhook_url=None):
+        self.calls.append(lookup_value)
+        return {
+            "Response": {"Status": "Success"},
+            "CompanyMasterSummary": {"LastUpdatedDateTime": "2024-01-01"}
+        }
+
+
+def _scheduler(tmp_path, client, **kwargs):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    return RefreshScheduler(client, cache, path=str(tmp_path / "watchlist.sqlite3"), **kwargs)
+
+
+def _table(tmp_path, sql):
+    conn = sqlite3.connect(str(tmp_path / "watchlist.sqlite3"))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_spent_budget_leaves_unrefreshed_cins_due_and_queued(tmp_path):
+    client = _Client()
+    scheduler = _scheduler(tmp_path, client, daily_budget=1)
+
+    cins = ["L00000MH2000PLC000001", "L00000MH2000PLC000002", "L00000MH2000PLC000003"]
+    for cin in cins:
+        scheduler.watch(cin)
+        scheduler.revalidate(cin)
+
+    stats = scheduler.run_once()
+
+    assert stats["refreshed"] == 1
+    assert stats["over_budget"] is True
+    assert client.calls == cins[:1]
+
+    refreshed = dict(_table(tmp_path, "SELECT cin, last_refreshed FROM watchlist"))
+    assert refreshed[cins[0]] > 0
+    assert refreshed[cins[1]] == 0
+    assert refreshed[cins[2]] == 0
+
+    queued = [row[0] for row in _table(tmp_path, "SELECT cin FROM urgent ORDER BY queued_at, cin")]
+    assert queued == cins[1:]
+
+
+def test_failed_refresh_is_not_recorded_as_refreshed(tmp_path):
+    class FailingClient(_Client):
+        def fetch_company_data(self, *args, **kwargs):
+            raise ConnectionError("upstream down")
+
+    scheduler = _scheduler(tmp_path, FailingClient(), daily_budget=10)
+    scheduler.watch("L00000MH2000PLC000001")
+
+    stats = scheduler.run_once()
+
+    assert stats["failed"] == 1
+    assert _table(tmp_path, "SELECT last_refreshed FROM watchlist") == [(0,)]
+    assert scheduler.due(10) == ["L00000MH2000PLC000001"]
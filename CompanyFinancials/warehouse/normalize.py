@@ -0,0 +1,130 @@
+# warehouse/normalize.py
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Director lists inside DirectorSignatoryMasterBasic and the role they map to
+DIRECTOR_LISTS = (
+    ("DirectorCurrentMasterBasic", "current"),
+    ("DirectorPastMasterBasic", "past"),
+)
+
+# Sections are routed to the charges / financials tables by name
+CHARGE_SECTION_MARKERS = ("Charge",)
+FINANCIAL_SECTION_MARKERS = ("Financial", "BalanceSheet", "ProfitLoss", "CashFlow")
+
+# Fields that identify the reporting year of a financial row
+YEAR_FIELDS = ("Year", "FinancialYear", "YearEnding", "YearEnd", "FY")
+
+
+def _scalar(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return str(value)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _rows(value: Any) -> Iterator[Dict]:
+    """
+    Yield dict rows from a list-of-dicts, or from lists nested one level
+    inside a dict section.
+    """
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                yield item
+    elif isinstance(value, dict):
+        for child in value.values():
+            if isinstance(child, list):
+                yield from _rows(child)
+
+
+def _flat_row(row: Dict) -> Dict[str, Optional[str]]:
+    return {key: _scalar(value) for key, value in row.items() if not isinstance(value, (dict, list))}
+
+
+def _year_of(row: Dict) -> Optional[str]:
+    for field in YEAR_FIELDS:
+        if row.get(field) not in (None, ""):
+            return str(row[field])
+    return None
+
+
+def normalize_company(
+    cin: str,
+    response: Dict,
+    fetched_at: Optional[datetime] = None,
+    sections: Optional[List[str]] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Split one provider response into rows for the warehouse tables:
+    company_master, directors, charges and financials.
+
+    Pass `sections` to normalize only those top-level sections (used for
+    incremental refresh). Unknown sections are skipped.
+    """
+    fetched_at = fetched_at or datetime.utcnow()
+    cin = cin.upper()
+    key = {"cin": cin, "fetched_at": fetched_at}
+
+    def wanted(name: str) -> bool:
+        return sections is None or name in sections
+
+    tables: Dict[str, List[Dict]] = {
+        "company_master": [],
+        "directors": [],
+        "charges": [],
+        "financials": []
+    }
+
+    master = response.get("CompanyMasterSummary")
+    if isinstance(master, dict) and wanted("CompanyMasterSummary"):
+        # Provider fields first, so they can never overwrite the key columns
+        row = _flat_row(master)
+        row.update(key, request_id=_scalar((response.get("Response") or {}).get("RequestId")))
+        tables["company_master"].append(row)
+
+    directors = response.get("DirectorSignatoryMasterBasic")
+    if isinstance(directors, dict) and wanted("DirectorSignatoryMasterBasic"):
+        for list_name, role in DIRECTOR_LISTS:
+            for director in _rows(directors.get(list_name)):
+                row = _flat_row(director)
+                row.update(key, role=role)
+                tables["directors"].append(row)
+
+    for name, value in response.items():
+        if not wanted(name):
+            continue
+
+        if any(marker in name for marker in CHARGE_SECTION_MARKERS):
+            for charge in _rows(value):
+                row = _flat_row(charge)
+                row.update(key, section=name)
+                tables["charges"].append(row)
+
+        elif any(marker in name for marker in FINANCIAL_SECTION_MARKERS):
+            for line in _rows(value):
+                year = _year_of(line)
+                for item, raw in line.items():
+                    if item in YEAR_FIELDS:
+                        continue
+                    amount = _to_float(raw)
+                    if amount is None:
+                        continue
+                    tables["financials"].append(
+                        dict(key, section=name, year=year, line_item=item, value=amount)
+                    )
+
+    return tables
+
@@ -0,0 +1,195 @@
+# warehouse/store.py
+
+import os
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from warehouse.normalize import normalize_company
+
+TABLES = ("company_master", "directors", "charges", "financials")
+
+# Columns with a fixed type in every table; every other column is stored
+# as string
+TYPED_COLUMNS = {
+    "cin": pa.string(),
+    "fetched_at": pa.timestamp("us"),
+}
+
+# Typed columns normalize_company fills itself. Provider fields of the same
+# name in other tables (a text "value" among director details) stay strings.
+TABLE_TYPED_COLUMNS = {
+    "financials": {"value": pa.float64()},
+}
+
+# Columns every row of a table has, whatever the provider sent; the schema
+# of a table with no files yet. See normalize_company.
+TABLE_COLUMNS = {
+    "company_master": ("cin", "fetched_at", "request_id"),
+    "directors": ("cin", "fetched_at", "role"),
+    "charges": ("cin", "fetched_at", "section"),
+    "financials": ("cin", "fetched_at", "section", "year", "line_item", "value"),
+}
+
+PARTITION_FIELD = pa.field("ingest_date", pa.string())
+
+
+def _column_type(table: str, name: str) -> pa.DataType:
+    typed = TABLE_TYPED_COLUMNS.get(table, {})
+    return typed.get(name) or TYPED_COLUMNS.get(name, pa.string())
+
+
+def _schema_for(table: str, rows: List[Dict]) -> pa.Schema:
+    names: Dict[str, None] = {}
+    for row in rows:
+        for name in row:
+            names.setdefault(name, None)
+
+    return pa.schema([(name, _column_type(table, name)) for name in names])
+
+
+def _empty_schema(table: str) -> pa.Schema:
+    columns = [(name, _column_type(table, name)) for name in TABLE_COLUMNS[table]]
+    return pa.schema(columns).append(PARTITION_FIELD)
+
+
+class Warehouse:
+    """
+    Parquet tables under `root/<table>/ingest_date=YYYY-MM-DD/`.
+
+        wh = Warehouse("data/warehouse")
+        wh.scan("financials", columns=["cin", "year", "value"],
+                where=pc.field("line_item") == "Revenue")
+    """
+
+    def __init__(self, root: str = "data/warehouse"):
+        self.root = root
+
+    def table_path(self, table: str) -> str:
+        if table not in TABLES:
+            raise ValueError(f"Unknown table {table}")
+        return os.path.join(self.root, table)
+
+    def write(self, table: str, rows: List[Dict], ingest_date: Optional[date] = None) -> Optional[str]:
+        if not rows:
+            return None
+
+        ingest_date = ingest_date or date.today()
+        folder = os.path.join(self.table_path(table), f"ingest_date={ingest_date.isoformat()}")
+        os.makedirs(folder, exist_ok=True)
+
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        path = os.path.join(folder, name)
+        # Dot-prefixed files are ignored by dataset discovery until renamed
+        tmp_path = os.path.join(folder, f".{name}.tmp")
+
+        arrow_table = pa.Table.from_pylist(rows, schema=_schema_for(table, rows))
+        pq.write_table(arrow_table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+        return path
+
+    def dataset(self, table: str) -> ds.Dataset:
+        """
+        The table as one dataset. A table with no Parquet files yet is an
+        empty dataset with its key columns, so scans and filters on them
+        still work.
+        """
+        path = self.table_path(table)
+        empty = ds.dataset(_empty_schema(table).empty_table())
+        if not os.path.isdir(path):
+            return empty
+
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        fragments = list(dataset.get_fragments())
+        if not fragments:
+            return empty
+
+        # Batches carry different provider columns; scan with the union
+        schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments])
+        for field in dataset.partitioning.schema:
+            if schema.get_field_index(field.name) == -1:
+                schema = schema.append(field)
+
+        return ds.dataset(path, schema=schema, format="parquet", partitioning="hive")
+
+    def scan(
+        self,
+        table: str,
+        columns: Optional[List[str]] = None,
+        where: Optional[pc.Expression] = None,
+        since: Optional[date] = None
+    ) -> pa.Table:
+        """
+        Read a table across all companies. `since` prunes whole date
+        partitions; `where` is pushed down to the Parquet reader.
+        """
+        dataset = self.dataset(table)
+
+        if since is not None:
+            partition_filter = pc.field("ingest_date") >= pc.scalar(since.isoformat())
+            where = partition_filter if where is None else (where & partition_filter)
+
+        return dataset.to_table(columns=columns, filter=where)
+
+    def query(self, table: str, columns: Optional[List[str]] = None, **equals) -> pa.Table:
+        """
+        Convenience scan with equality filters, e.g. query("directors", cin="U7...").
+        """
+        where = None
+        for name, value in equals.items():
+            condition = pc.field(name) == value
+            where = condition if where is None else (where & condition)
+        return self.scan(table, columns=columns, where=where)
+
+
+class WarehouseWriter:
+    """
+    Buffers normalized rows and writes one Parquet file per table every
+    `batch_size` companies, so bulk ingests do not produce a file per CIN.
+    """
+
+    def __init__(self, warehouse: Warehouse, batch_size: int = 500):
+        self.warehouse = warehouse
+        self.batch_size = batch_size
+        self._rows: Dict[str, List[Dict]] = {table: [] for table in TABLES}
+        self._companies = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def add(
+        self,
+        cin: str,
+        response: Dict,
+        fetched_at: Optional[datetime] = None,
+        sections: Optional[List[str]] = None
+    ):
+        tables = normalize_company(cin, response, fetched_at=fetched_at, sections=sections)
+
+        with self._lock:
+            for table, rows in tables.items():
+                self._rows[table].extend(rows)
+            self._companies += 1
+            full = self._companies >= self.batch_size
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._rows = self._rows, {table: [] for table in TABLES}
+            self._companies = 0
+
+        for table, rows in pending.items():
+            self.warehouse.write(table, rows)
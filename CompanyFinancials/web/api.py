@@ -0,0 +1,210 @@
+# web/api.py
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from providers.cache import make_key
+from web.flatten import build_view
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+MAX_SEARCH_RESULTS = 50
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def _fetch(cin: str) -> Dict:
+    scheduler = current_app.extensions.get("refresh_scheduler")
+    if scheduler is not None:
+        # Serves the last good response at once, refreshing it if stale
+        response = scheduler.get(cin)
+    else:
+        response = current_app.extensions["insta_client"].fetch_company_data(
+            lookup_type="CompanyCIN",
+            lookup_value=cin,
+            scope="All",
+            webhook_url=current_app.extensions.get("insta_webhook_url")
+        )
+
+    search_index = current_app.extensions.get("search_index")
+    if search_index is not None:
+        search_index.add_response(cin, response)
+
+    return response
+
+
+def _json_response(payload: Any) -> Response:
+    """
+    JSON response with a content ETag (304 on If-None-Match) and gzip
+    when the client accepts it. The gzip body is a different
+    representation, so it gets its own ETag ("-gz" suffix).
+    """
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    etag = hashlib.sha1(body).hexdigest()
+
+    # Range requests are served from the identity body
+    compress = (
+        len(body) >= GZIP_MIN_BYTES
+        and "gzip" in request.accept_encodings
+        and request.range is None
+    )
+    if compress:
+        etag += "-gz"
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, max-age=60"
+    response.vary.add("Accept-Encoding")
+    response = response.make_conditional(request)
+
+    if compress and response.status_code == 200:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+
+    return response
+
+
+def _page_args():
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    return page, per_page
+
+
+def _paginate(items: List, page: int, per_page: int) -> Dict:
+    start = (page - 1) * per_page
+    return {
+        "items": items[start:start + per_page],
+        "page": page,
+        "per_page": per_page,
+        "total": len(items)
+    }
+
+
+def _collapse(value: Any, path: str, per_page: int) -> Any:
+    """
+    Replace lists longer than one page with a placeholder the UI can
+    fetch on demand through the section endpoint.
+    """
+    if isinstance(value, dict):
+        return {
+            key: _collapse(child, f"{path}.{key}" if path else key, per_page)
+            for key, child in value.items()
+        }
+    if isinstance(value, list) and len(value) > per_page:
+        return {"_lazy": True, "path": path, "total": len(value)}
+    return value
+
+
+def _section_info(name: str, value: Any) -> Dict:
+    if isinstance(value, list):
+        return {"name": name, "type": "table", "size": len(value)}
+    if isinstance(value, dict):
+        return {"name": name, "type": "object", "size": len(value)}
+    return {"name": name, "type": "value", "size": 1}
+
+
+def _resolve(value: Any, path: str):
+    for part in filter(None, path.split(".")):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+# -------------------------------------------------
+# Routes
+# -------------------------------------------------
+@api.route("/company/<cin>", methods=["GET"])
+def company_overview(cin):
+    """
+    Summary and section list; `?fields=A,B` also returns those sections.
+    """
+    try:
+        response = _fetch(cin.strip())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+
+    _, per_page = _page_args()
+    view = build_view(response, make_key("CompanyCIN", cin))
+
+    payload = {
+        "cin": cin,
+        "summary": view["summary"],
+        "sections": [
+            _section_info(name, value)
+            for name, value in response.items()
+            if name != "Response"
+        ]
+    }
+
+    fields = request.args.get("fields")
+    if fields:
+        payload["data"] = {
+            name: _collapse(response[name], name, per_page)
+            for name in (f.strip() for f in fields.split(","))
+            if name in response
+        }
+
+    return _json_response(payload)
+
+
+@api.route("/company/<cin>/sections/<section>", methods=["GET"])
+def company_section(cin, section):
+    """
+    One section, or a nested table via `?path=Sub.Table`. Lists are
+    paginated with `page` / `per_page`.
+    """
+    try:
+        response = _fetch(cin.strip())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+
+    if section not in response:
+        return jsonify({"error": f"Unknown section {section}"}), 404
+
+    path = request.args.get("path", "")
+    value = _resolve(response[section], path)
+    if value is None:
+        return jsonify({"error": f"Unknown path {path}"}), 404
+
+    page, per_page = _page_args()
+    full_path = f"{section}.{path}" if path else section
+
+    if isinstance(value, list):
+        payload = _paginate(value, page, per_page)
+    else:
+        payload = {"data": _collapse(value, full_path, per_page)}
+
+    payload["section"] = section
+    payload["path"] = full_path
+
+    return _json_response(payload)
+
+
+@api.route("/search", methods=["GET"])
+def search():
+    """
+    Autocomplete over locally known companies: CIN / symbol prefix,
+    name prefix, then fuzzy name. Listed companies without a CIN are
+    included with lookup "symbol"; `?cin=1` returns only CIN entries.
+    """
+    query = request.args.get("q", "").strip()
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_SEARCH_RESULTS)
+
+    search_index = current_app.extensions.get("search_index")
+    if search_index is None or not query:
+        return jsonify({"query": query, "results": []})
+
+    require_cin = request.args.get("cin") == "1"
+    return jsonify({"query": query, "results": search_index.search(query, limit, require_cin)})
@@ -1,128 +1,156 @@
 # -------------------------------------------------
 # Flask Web App – Railway + Local Compatible
+#
+#   gunicorn -c gunicorn.conf.py          (production, see wsgi.py)
+#   python -m web.app                     (local dev server)
 # -------------------------------------------------
 
 import os
-import sys
-import yaml
-from flask import Flask, render_template, request, jsonify
+from typing import Dict, Optional
 
-print(">>> app.py started")
+from flask import Blueprint, Flask, current_app, jsonify, render_template, request
 
-# -------------------------------------------------
-# Resolve project root (for local dev only)
-# -------------------------------------------------
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.append(BASE_DIR)
+from common import metrics
+from providers.cache import ResponseCache, make_key
+from providers.instafinancials import InstaFinancialsClient
+from providers.singleflight import FileLockSingleFlight, SingleFlight, fcntl
+from pipeline.refresh_scheduler import RefreshScheduler
+from search.company_index import CompanySearchIndex
+from web.api import api
+from web.flatten import build_view
+from web.jobs import JobRunner, JobStore
+from web.settings import load_settings
+from web.webhooks import webhooks
 
-# -------------------------------------------------
-# Load config.yaml (LOCAL fallback only)
-# -------------------------------------------------
-CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+# Upper bound for /jobs/<id>?wait=N long-polls
+MAX_JOB_WAIT_SECONDS = 30
 
-local_config = {}
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "r") as f:
-        local_config = yaml.safe_load(f)
+views = Blueprint("views", __name__)
 
-# -------------------------------------------------
-# Environment Variables (Railway)
-# -------------------------------------------------
-INSTA_API_KEY = os.environ.get(
-    "INSTA_API_KEY",
-    local_config.get("insta", {}).get("api_key")
-)
 
-WEBHOOK_URL = os.environ.get(
-    "WEBHOOK_URL",
-    local_config.get("insta", {}).get("webhook_url")
-)
+def _service(name: str):
+    return current_app.extensions[name]
 
-BASE_URL = local_config.get("insta", {}).get(
-    "base_url",
-    "https://instafinancials.com/api/InstaBasic/v1/json"
-)
 
-# -------------------------------------------------
-# Import Insta client
-# -------------------------------------------------
-from providers.instafinancials import InstaFinancialsClient
+def _listed_without_cin(value: str) -> bool:
+    """
+    True when `value` is the symbol of a listed company the search index
+    knows only by symbol (offered by the autocomplete, but not a CIN).
+    """
+    matches = _service("search_index").search(value, limit=1)
+    if not matches or matches[0]["lookup"] != "symbol":
+        return False
+    return (matches[0].get("symbol") or "").upper() == value.upper()
+
 
 # -------------------------------------------------
-# Helper Functions
+# App factory
 # -------------------------------------------------
-def flatten_json(data, parent_key="", sep="."):
-    items = []
-    for k, v in data.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_json(v, new_key, sep))
-        elif isinstance(v, list):
-            items.append((new_key, str(v)))
-        else:
-            items.append((new_key, v))
-    return items
-
-
-def group_by_section(flat_items):
-    sections = {}
-    for key, value in flat_items:
-        if "." in key:
-            section, subkey = key.split(".", 1)
-        else:
-            section = "General"
-            subkey = key
-
-        if section not in sections:
-            sections[section] = {}
-
-        if section == "DirectorSignatoryMasterBasic":
-            if subkey.startswith("DirectorCurrentMasterBasic"):
-                sub_section = "Current Directors"
-            elif subkey.startswith("DirectorPastMasterBasic"):
-                sub_section = "Past Directors"
-            else:
-                sub_section = "Other"
-
-            sections[section].setdefault(sub_section, []).append((subkey, value))
-        else:
-            sections[section].setdefault("Main", []).append((subkey, value))
-
-    return sections
-
-
-def extract_summary(flat_items):
-    summary_keys = [
-        "Response.Status",
-        "Response.RequestId",
-        "CompanyMasterSummary.CompanyStatus",
-        "CompanyMasterSummary.LastUpdatedDateTime"
-    ]
-
-    summary = {}
-    for key, value in flat_items:
-        if key in summary_keys:
-            summary[key.split(".")[-1]] = value
-
-    return summary
+def create_app(settings: Optional[Dict] = None, start_background: bool = True) -> Flask:
+    """
+    Build the app and its shared services.
+
+    The app can be built once in the gunicorn master (preload_app): the
+    response cache, job store and refresh watchlist open their SQLite
+    files lazily, on first use in each process, and the search index
+    closes the connection it loads with, so no handle crosses a fork.
+    Every worker then shares the same files. Background threads are
+    started per process by `start_background_services`; pass
+    start_background=False when a post-fork hook will do it.
+    """
+    settings = settings or load_settings()
+
+    app = Flask(__name__)
+
+    cache = ResponseCache(
+        path=settings["cache_path"],
+        ttl_seconds=settings["cache_ttl_seconds"],
+        max_memory_entries=settings["cache_max_memory_entries"],
+        max_disk_entries=settings["cache_max_disk_entries"],
+        stale_seconds=settings["cache_stale_seconds"]
+    )
 
+    # Coalesce identical in-flight lookups; across gunicorn workers when possible
+    if fcntl is not None:
+        singleflight = FileLockSingleFlight(
+            lock_dir=os.path.join(os.path.dirname(settings["cache_path"]), "locks"),
+            cache=cache
+        )
+    else:
+        singleflight = SingleFlight()
+
+    client = InstaFinancialsClient(
+        api_key=settings["insta_api_key"],
+        base_url=settings["base_url"],
+        cache=cache,
+        singleflight=singleflight
+    )
 
-# -------------------------------------------------
-# Flask App
-# -------------------------------------------------
-app = Flask(__name__)
+    jobs = JobStore(path=settings["jobs_db_path"])
+
+    job_runner = JobRunner(
+        client=client,
+        store=jobs,
+        webhook_url=settings["webhook_url"],
+        max_workers=settings["job_workers"]
+    )
+
+    # Loaded here so forked workers inherit the in-memory index
+    search_index = CompanySearchIndex(path=settings["search_index_path"])
+
+    # Stale-while-revalidate for hot CINs; also refreshes them ahead of expiry
+    scheduler = RefreshScheduler(
+        client=client,
+        cache=cache,
+        path=settings["scheduler_path"],
+        daily_budget=settings["scheduler_daily_budget"],
+        interval=settings["scheduler_interval_seconds"],
+        batch_size=settings["scheduler_batch_size"],
+        refresh_ahead_seconds=settings["scheduler_refresh_ahead_seconds"]
+    )
+
+    app.extensions["settings"] = settings
+    app.extensions["response_cache"] = cache
+    app.extensions["insta_client"] = client
+    app.extensions["insta_webhook_url"] = settings["webhook_url"]
+    app.extensions["job_store"] = jobs
+    app.extensions["job_runner"] = job_runner
+    app.extensions["search_index"] = search_index
+    app.extensions["refresh_scheduler"] = scheduler
+
+    app.register_blueprint(views)
+    app.register_blueprint(api)
+    # Shared with webhook_server.py
+    app.register_blueprint(webhooks)
+    metrics.instrument_flask(app, "web")
 
-client = InstaFinancialsClient(
-    api_key=INSTA_API_KEY,
-    base_url=BASE_URL
-)
+    if start_background:
+        start_background_services(app)
+
+    return app
+
+
+def start_background_services(app: Flask):
+    """
+    Start per-process background threads. Called from gunicorn's
+    post_worker_init so that threads are never created before fork.
+    Each worker starts the refresh scheduler, which only refreshes in the
+    worker holding its lock (see RefreshScheduler).
+    """
+    if app.extensions["settings"]["scheduler_enabled"]:
+        app.extensions["refresh_scheduler"].start()
+
+
+def stop_background_services(app: Flask):
+    app.extensions["refresh_scheduler"].stop(timeout=5)
 
 # -------------------------------------------------
 # Main UI Route
 # -------------------------------------------------
-@app.route("/", methods=["GET", "POST"])
+@views.route("/", methods=["GET", "POST"])
 def index():
 
+    cin = None
     grouped_result = None
     summary_data = None
     error = None
@@ -132,48 +160,86 @@ def index():
 
         if not cin:
             error = "CIN is required"
-        else:
+        elif _listed_without_cin(cin):
+            error = f"{cin} is a listed company with no CIN on record yet; enter its CIN"
+        elif request.form.get("view") == "full":
+            # Server-side render of the whole response (no-JS fallback);
+            # by default the page loads sections from /api/company/<cin>
             try:
-                response = client.fetch_company_data(
-                    lookup_type="CompanyCIN",
-                    lookup_value=cin,
-                    scope="All",
-                    webhook_url=WEBHOOK_URL
-                )
-
-                grouped_result = response
-                summary_data = {
-                "Status": response.get("Response", {}).get("Status"),
-                "RequestId": response.get("Response", {}).get("RequestId")
-}
+                response = _service("refresh_scheduler").get(cin)
+
+                view = build_view(response, make_key("CompanyCIN", cin))
+                grouped_result = view["sections"]
+                summary_data = view["summary"]
+                _service("search_index").add_response(cin, response)
 
             except Exception as e:
                 error = str(e)
 
     return render_template(
         "index.html",
+        cin=cin,
+        lazy=bool(cin) and grouped_result is None and error is None,
         grouped_result=grouped_result,
         summary_data=summary_data,
         error=error
     )
 
 # -------------------------------------------------
-# Webhook Endpoint (CRITICAL for Railway)
+# Health / Stats
+# -------------------------------------------------
+@views.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok"})
+
+
+@views.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(_service("response_cache").stats())
+
+
+@views.route("/scheduler/stats", methods=["GET"])
+def scheduler_stats():
+    return jsonify(_service("refresh_scheduler").stats())
+
+# -------------------------------------------------
+# Async Lookup Jobs
 # -------------------------------------------------
-@app.route("/webhook/insta", methods=["POST"])
-def insta_webhook():
-    data = request.json
-    print(">>> Webhook received:", data)
-    return jsonify({"status": "ok"}), 200
+@views.route("/jobs", methods=["POST"])
+def create_job():
+    params = request.get_json(silent=True) or request.form
+    cin = (params.get("cin") or "").strip()
+    scope = params.get("scope") or "All"
+
+    if not cin:
+        return jsonify({"error": "CIN is required"}), 400
+
+    job_id = _service("job_runner").submit("CompanyCIN", cin, scope)
+
+    return jsonify({
+        "job_id": job_id,
+        "status": "pending",
+        "url": f"/jobs/{job_id}"
+    }), 202
+
+
+@views.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    wait = min(request.args.get("wait", 0, type=float), MAX_JOB_WAIT_SECONDS)
+    job = _service("job_store").wait(job_id, timeout=wait)
+
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(job)
 
 
 # -------------------------------------------------
-# Run App (Railway Compatible)
+# Local dev server (production runs gunicorn, see gunicorn.conf.py)
 # -------------------------------------------------
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    print(f">>> Starting server on port {port}")
-    app.run(host="0.0.0.0", port=port)
+    create_app().run(host="0.0.0.0", port=port)
 
 # # -------------------------------------------------
 # # app.py  (Flask Web UI for InstaFinancials)
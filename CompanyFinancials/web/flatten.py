@@ -0,0 +1,159 @@
+# web/flatten.py
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from pipeline.snapshots import last_updated_of
+from providers.instafinancials import request_id_of
+
+
+# Sub-section rules per top-level section: (subkey prefix, label) pairs.
+# Sections without rules go to "Main"; unmatched keys go to "Other".
+SECTION_RULES = {
+    "DirectorSignatoryMasterBasic": (
+        ("DirectorCurrentMasterBasic", "Current Directors"),
+        ("DirectorPastMasterBasic", "Past Directors"),
+    ),
+}
+
+DEFAULT_SUBSECTION = "Main"
+UNMATCHED_SUBSECTION = "Other"
+GENERAL_SECTION = "General"
+
+# Flattened key -> summary card label
+SUMMARY_KEYS = {
+    "Response.Status": "Status",
+    "Response.RequestId": "RequestId",
+    "CompanyMasterSummary.CompanyStatus": "CompanyStatus",
+    "CompanyMasterSummary.LastUpdatedDateTime": "LastUpdatedDateTime",
+}
+
+VIEW_CACHE_SIZE = 128
+
+
+def iter_flat(data: Any, parent_key: str = "", sep: str = ".") -> Iterator[Tuple[str, Any]]:
+    """
+    Lazily yield (key, value) leaves of nested JSON in document order.
+
+    Uses an explicit stack instead of recursion. List items are expanded
+    as indexed rows, e.g. `DirectorSignatoryMasterBasic.DirectorCurrentMasterBasic[0].DIN`.
+    Empty lists are kept as leaves so the key still shows up.
+    """
+    stack = [(parent_key, data)]
+
+    while stack:
+        key, value = stack.pop()
+
+        if isinstance(value, dict):
+            prefix = key + sep if key else ""
+            stack.extend((prefix + str(k), v) for k, v in reversed(value.items()))
+        elif isinstance(value, list) and value:
+            stack.extend((f"{key}[{i}]", v) for i, v in reversed(list(enumerate(value))))
+        else:
+            yield key, value
+
+
+def flatten_json(data, parent_key="", sep="."):
+    return list(iter_flat(data, parent_key, sep))
+
+
+def split_section(key: str, sep: str = ".") -> Tuple[str, str]:
+    """
+    Split a flattened key into (top-level section, remainder).
+    """
+    dot = key.find(sep)
+    bracket = key.find("[")
+
+    if bracket != -1 and (dot == -1 or bracket < dot):
+        return key[:bracket], key[bracket:]
+    if dot != -1:
+        return key[:dot], key[dot + len(sep):]
+    return GENERAL_SECTION, key
+
+
+def group_by_section(flat_items: Iterable[Tuple[str, Any]]) -> Dict[str, Dict[str, List]]:
+    sections: Dict[str, Dict[str, List]] = {}
+
+    for key, value in flat_items:
+        section, subkey = split_section(key)
+        rules = SECTION_RULES.get(section)
+
+        if rules is None:
+            sub_section = DEFAULT_SUBSECTION
+        else:
+            sub_section = UNMATCHED_SUBSECTION
+            for prefix, label in rules:
+                if subkey.startswith(prefix):
+                    sub_section = label
+                    break
+
+        sections.setdefault(section, {}).setdefault(sub_section, []).append((subkey, value))
+
+    return sections
+
+
+def extract_summary(flat_items: Iterable[Tuple[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+
+    for key, value in flat_items:
+        label = SUMMARY_KEYS.get(key)
+        if label is not None:
+            summary[label] = value
+            if len(summary) == len(SUMMARY_KEYS):
+                break
+
+    return summary
+
+
+def response_hash(response: Dict) -> str:
+    body = json.dumps(response, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+_view_cache: "OrderedDict[Hashable, Dict]" = OrderedDict()
+_view_lock = threading.Lock()
+
+
+def view_key(response: Dict, key: Optional[str] = None) -> Hashable:
+    """
+    Cache key of a response's view: its lookup key (see make_key) and
+    version (RequestId / LastUpdatedDateTime), or its content hash when
+    either is missing.
+    """
+    request_id = request_id_of(response)
+    last_updated = last_updated_of(response) if isinstance(response, dict) else None
+
+    if key is None or (request_id is None and last_updated is None):
+        return response_hash(response)
+    return key, request_id, last_updated
+
+
+def build_view(response: Dict, key: Optional[str] = None) -> Dict:
+    """
+    Flattened items, sections and summary for a response, cached by
+    `view_key` so repeat renders of the same company skip the work.
+    """
+    cache_key = view_key(response, key)
+
+    with _view_lock:
+        view = _view_cache.get(cache_key)
+        if view is not None:
+            _view_cache.move_to_end(cache_key)
+            return view
+
+    flat_items = flatten_json(response)
+    view = {
+        "flat": flat_items,
+        "sections": group_by_section(flat_items),
+        "summary": extract_summary(flat_items)
+    }
+
+    with _view_lock:
+        _view_cache[cache_key] = view
+        while len(_view_cache) > VIEW_CACHE_SIZE:
+            _view_cache.popitem(last=False)
+
+    return view
@@ -0,0 +1,269 @@
+# web/jobs.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from providers.instafinancials import InstaFinancialsClient, is_complete_response, request_id_of
+
+
+class JobStore:
+    """
+    SQLite-backed lookup jobs, shared by every worker and by webhook_server.
+
+    A job is `pending` while the upstream call runs, `waiting` once the
+    provider has acknowledged it with a RequestId, and `done` / `failed`
+    when finished. Webhooks that arrive before their job has recorded the
+    RequestId are parked in an inbox and claimed on attach.
+    """
+
+    def __init__(self, path: str = "data/jobs/jobs.sqlite3", retention_seconds: int = 24 * 60 * 60):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Connections inherited from a pre-fork parent must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Created on first use, so building the store opens nothing
+            # in a pre-fork parent
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    lookup_type TEXT NOT NULL,
+                    lookup_value TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    request_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_request_id ON jobs (request_id);
+                CREATE TABLE IF NOT EXISTS webhook_inbox (
+                    request_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    received_at REAL NOT NULL
+                );
+                """
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-then-write
+        # sequences cannot interleave between workers
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        job = {
+            "job_id": row["id"],
+            "lookup_type": row["lookup_type"],
+            "lookup_value": row["lookup_value"],
+            "scope": row["scope"],
+            "status": row["status"],
+            "request_id": row["request_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def create(self, lookup_type: str, lookup_value: str, scope: str = "All") -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE created_at < ?",
+                (now - self.retention_seconds,)
+            )
+            conn.execute(
+                "DELETE FROM webhook_inbox WHERE received_at < ?",
+                (now - self.retention_seconds,)
+            )
+            conn.execute(
+                """
+                INSERT INTO jobs (id, lookup_type, lookup_value, scope, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'pending', ?, ?)
+                """,
+                (job_id, lookup_type, lookup_value, scope, now, now)
+            )
+
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def wait(self, job_id: str, timeout: float = 0, poll_interval: float = 0.25) -> Optional[Dict]:
+        """
+        Long-poll: return the job once it is finished or `timeout` expires.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            if time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def complete(self, job_id: str, result: Dict):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def attach_request_id(self, job_id: str, request_id: str) -> Optional[Dict]:
+        """
+        Mark the job as waiting for its webhook. If the webhook already
+        arrived, complete the job with it and return the finished job.
+
+        The parked payload stays in the inbox until `retention_seconds`:
+        coalesced lookups share one RequestId and may attach later.
+        """
+        now = time.time()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT payload FROM webhook_inbox WHERE request_id = ?",
+                (request_id,)
+            ).fetchone()
+
+            if row is None:
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = 'waiting', request_id = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (request_id, now, job_id)
+                )
+                return None
+
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'done', request_id = ?, result = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (request_id, row["payload"], now, job_id)
+            )
+
+        return self.get(job_id)
+
+    def complete_by_request_id(self, request_id: str, payload: Dict) -> List[Dict]:
+        """
+        Complete every job waiting on `request_id` (single-flight hands one
+        RequestId to all coalesced lookups) and return them.
+
+        The payload is also kept in the inbox for jobs that attach the
+        RequestId later; it expires with `retention_seconds`.
+        """
+        now = time.time()
+        body = json.dumps(payload)
+
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO webhook_inbox (request_id, payload, received_at)
+                VALUES (?, ?, ?)
+                """,
+                (request_id, body, now)
+            )
+
+            job_ids = [
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE request_id = ? AND status = 'waiting'",
+                    (request_id,)
+                )
+            ]
+
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'done', result = ?, updated_at = ?
+                WHERE request_id = ? AND status = 'waiting'
+                """,
+                (body, now, request_id)
+            )
+
+        return [job for job in map(self.get, job_ids) if job is not None]
+
+
+class JobRunner:
+    """
+    Runs lookups in a background pool so the request thread returns at once.
+    """
+
+    def __init__(
+        self,
+        client: InstaFinancialsClient,
+        store: JobStore,
+        webhook_url: Optional[str] = None,
+        max_workers: int = 16
+    ):
+        self.client = client
+        self.store = store
+        self.webhook_url = webhook_url
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lookup-job")
+
+    def submit(self, lookup_type: str, lookup_value: str, scope: str = "All") -> str:
+        job_id = self.store.create(lookup_type, lookup_value, scope)
+        self._executor.submit(self._run, job_id, lookup_type, lookup_value, scope)
+        return job_id
+
+    def _run(self, job_id: str, lookup_type: str, lookup_value: str, scope: str):
+        try:
+            response = self.client.fetch_company_data(
+                lookup_type=lookup_type,
+                lookup_value=lookup_value,
+                scope=scope,
+                webhook_url=self.webhook_url
+            )
+        except Exception as e:
+            self.store.fail(job_id, str(e))
+            return
+
+        request_id = request_id_of(response)
+
+        # Provider acknowledged the request; the data follows on the webhook
+        if self.webhook_url and request_id and not is_complete_response(response):
+            self.store.attach_request_id(job_id, request_id)
+        else:
+            self.store.complete(job_id, response)
@@ -0,0 +1,58 @@
+# web/settings.py
+#
+# Environment variables (Railway) take precedence over config.yaml,
+# which is only a local fallback.
+
+import os
+from typing import Dict
+
+import yaml
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+
+DEFAULT_BASE_URL = "https://instafinancials.com/api/InstaBasic/v1/json"
+
+
+def _flag(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def _path(value: str) -> str:
+    return value if os.path.isabs(value) else os.path.join(BASE_DIR, value)
+
+
+def load_settings(config_path: str = CONFIG_PATH) -> Dict:
+    local_config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            local_config = yaml.safe_load(f) or {}
+
+    env = os.environ
+    insta = local_config.get("insta", {})
+    cache = local_config.get("cache", {})
+    scheduler = local_config.get("scheduler", {})
+
+    return {
+        "insta_api_key": env.get("INSTA_API_KEY", insta.get("api_key")),
+        "webhook_url": env.get("WEBHOOK_URL", insta.get("webhook_url")),
+        "base_url": insta.get("base_url", DEFAULT_BASE_URL),
+
+        "cache_path": _path(env.get("INSTA_CACHE_PATH", cache.get("path", "data/cache/insta_responses.sqlite3"))),
+        "cache_ttl_seconds": int(env.get("INSTA_CACHE_TTL_SECONDS", cache.get("ttl_seconds", 24 * 60 * 60))),
+        "cache_max_memory_entries": cache.get("max_memory_entries", 256),
+        "cache_max_disk_entries": cache.get("max_disk_entries", 10000),
+        "cache_stale_seconds": cache.get("stale_seconds", 7 * 24 * 60 * 60),
+
+        "jobs_db_path": _path(env.get("JOBS_DB_PATH", "data/jobs/jobs.sqlite3")),
+        "job_workers": int(env.get("JOB_WORKERS", 16)),
+
+        "search_index_path": _path(env.get("SEARCH_INDEX_PATH", "data/search/companies.sqlite3")),
+
+        "scheduler_enabled": _flag(env.get("REFRESH_SCHEDULER_ENABLED", scheduler.get("enabled", True))),
+        "scheduler_path": _path(env.get("REFRESH_WATCHLIST_PATH", scheduler.get("path", "data/scheduler/watchlist.sqlite3"))),
+        "scheduler_daily_budget": int(env.get("REFRESH_DAILY_BUDGET", scheduler.get("daily_budget", 500))),
+        "scheduler_interval_seconds": scheduler.get("interval_seconds", 60),
+        "scheduler_batch_size": scheduler.get("batch_size", 10),
+        "scheduler_refresh_ahead_seconds": scheduler.get("refresh_ahead_seconds", 2 * 60 * 60),
+    }
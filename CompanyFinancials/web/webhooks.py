@@ -0,0 +1,51 @@
+# web/webhooks.py
+#
+# The InstaFinancials webhook, shared by web/app.py and webhook_server.py
+# so a payload has the same effect whichever process receives it.
+
+from flask import Blueprint, current_app, jsonify, request
+
+from common import metrics
+from providers.cache import make_key
+from providers.instafinancials import request_id_of
+
+PAYLOAD_APPEND_SECONDS = metrics.histogram(
+    "payload_log_append_seconds",
+    "Time to append a webhook payload to the log"
+)
+
+webhooks = Blueprint("webhooks", __name__)
+
+
+@webhooks.route("/webhook/insta", methods=["POST"])
+def insta_webhook():
+    """
+    Record a provider payload and complete the jobs waiting on its
+    RequestId. Each completed lookup is written to the response cache and
+    the search index. The payload is also appended to the payload log
+    when the app has one.
+
+    Uses the app's "job_store", "response_cache" and "search_index"
+    extensions, and "payload_log" if set.
+    """
+    data = request.get_json(force=True)
+    request_id = request_id_of(data)
+    current_app.logger.info("Webhook received: %s", request_id)
+
+    # Optional: validate API key if Insta sends one
+    # api_key = request.headers.get("Authorization")
+
+    payload_log = current_app.extensions.get("payload_log")
+    if payload_log is not None:
+        with PAYLOAD_APPEND_SECONDS.time():
+            payload_log.append(data)
+
+    if request_id:
+        jobs = current_app.extensions["job_store"].complete_by_request_id(request_id, data)
+
+        # Coalesced lookups share a RequestId and usually a key
+        for key in {(job["lookup_type"], job["lookup_value"], job["scope"]) for job in jobs}:
+            current_app.extensions["response_cache"].set(make_key(*key), data)
+            current_app.extensions["search_index"].add_response(key[1], data)
+
+    return jsonify({"status": "received"}), 200
@@ -1,27 +1,52 @@
-from flask import Flask, request, jsonify
-import json
-import os
-from datetime import datetime
+from flask import Flask
+import atexit
+from typing import Dict, Optional
+
+from common import metrics
+from providers.cache import ResponseCache
+from search.company_index import CompanySearchIndex
+from storage.payload_log import PayloadLog
+from web.jobs import JobStore
+from web.settings import load_settings
+from web.webhooks import webhooks
+
+OUTPUT_DIR = "data/webhook_log"
+
+
+def create_app(output_dir: str = OUTPUT_DIR, settings: Optional[Dict] = None) -> Flask:
+    """
+    Build the standalone webhook receiver. It serves the same handler as
+    web/app.py (web/webhooks.py), on the same job store, response cache
+    and search index files, and also keeps every payload in the payload
+    log. The log (and its flusher thread) is opened here, not at import;
+    call `app.extensions["payload_log"].close()` on shutdown.
+    """
+    settings = settings or load_settings()
+
+    app = Flask(__name__)
+
+    # Append-only segmented log, indexed by CIN and RequestId
+    app.extensions["payload_log"] = PayloadLog(directory=output_dir)
+
+    # Same stores as web/app.py, so payloads received here complete its
+    # jobs and are served from its cache
+    app.extensions["job_store"] = JobStore(path=settings["jobs_db_path"])
+    app.extensions["response_cache"] = ResponseCache(
+        path=settings["cache_path"],
+        ttl_seconds=settings["cache_ttl_seconds"],
+        max_memory_entries=settings["cache_max_memory_entries"],
+        max_disk_entries=settings["cache_max_disk_entries"],
+        stale_seconds=settings["cache_stale_seconds"]
+    )
+    app.extensions["search_index"] = CompanySearchIndex(path=settings["search_index_path"])
+
+    app.register_blueprint(webhooks)
+    metrics.instrument_flask(app, "webhook")
+
+    return app
 
-app = Flask(__name__)
-
-OUTPUT_DIR = "data/webhook_payloads"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-@app.route("/webhook/insta", methods=["POST"])
-def insta_webhook():
-    payload = request.get_json(force=True)
-
-    # Optional: validate API key if Insta sends one
-    # api_key = request.headers.get("Authorization")
-
-    timestamp = datetime.utcnow().isoformat()
-    file_path = f"{OUTPUT_DIR}/insta_{timestamp}.json"
-
-    with open(file_path, "w") as f:
-        json.dump(payload, f, indent=2)
-
-    return jsonify({"status": "received"}), 200
 
 if __name__ == "__main__":
+    app = create_app()
+    atexit.register(app.extensions["payload_log"].close)
     app.run(port=5000)
@@ -0,0 +1,9 @@
+# wsgi.py
+#
+# Gunicorn entry point: gunicorn -c gunicorn.conf.py
+# The app is built once in the master (preload_app); background threads
+# are started in each worker by the post_worker_init hook.
+
+from web.app import create_app
+
+app = create_app(start_background=False)
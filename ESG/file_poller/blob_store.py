@@ -0,0 +1,123 @@
+# file_poller/blob_store.py
+
+import os
+import shutil
+import threading
+from typing import Dict, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from common import metrics
+from .models import Blob, FilingBlob
+from .writer import DIALECT_INSERTS
+
+BLOBS = metrics.counter(
+    "blob_store_ingests_total",
+    "Downloaded attachments by whether their bytes were already stored",
+    ("result",)
+)
+
+
+class BlobStore:
+    """
+    Attachments stored once per SHA-256 of their bytes:
+
+        <root>/ab/cd/abcd...ef.pdf
+
+    The legacy layout (data/<symbol>/<fy>/<attachment_name>) is kept as a
+    link to the blob: a symlink where possible, else a hard link, else a
+    copy. The same report filed on NSE and BSE, or re-filed under another
+    name, is stored and later extracted once.
+    """
+
+    def __init__(self, root: str = os.path.join("data", "blobs"), suffix: str = ".pdf"):
+        self.root = root
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256 + self.suffix)
+
+    def contains(self, sha256: str) -> bool:
+        return os.path.isfile(self.path_for(sha256))
+
+    def ingest(self, part_path: str, sha256: str) -> bool:
+        """
+        Move a fully written and hashed file into the store. Returns False
+        (and deletes `part_path`) when the blob already existed.
+        """
+        blob_path = self.path_for(sha256)
+
+        with self._lock:
+            if os.path.isfile(blob_path):
+                os.remove(part_path)
+                BLOBS.inc(result="duplicate")
+                return False
+
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(part_path, blob_path)
+
+        BLOBS.inc(result="new")
+        return True
+
+    def link(self, sha256: str, path: str):
+        """
+        Point `path` at the blob, replacing whatever is there atomically.
+        """
+        blob_path = self.path_for(sha256)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        tmp_path = f"{path}.link-{threading.get_ident()}"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+        try:
+            os.symlink(os.path.relpath(blob_path, os.path.dirname(path) or "."), tmp_path)
+        except (OSError, NotImplementedError):
+            try:
+                os.link(blob_path, tmp_path)
+            except OSError:
+                shutil.copyfile(blob_path, tmp_path)
+
+        os.replace(tmp_path, path)
+
+
+def record_blobs(db: Session, results: Iterable) -> int:
+    """
+    Store Blob and FilingBlob rows for finished downloads whose `tags` are
+    raw filing ids. Not committed. Returns the number of mappings added.
+    """
+    insert = DIALECT_INSERTS[db.get_bind().dialect.name]
+
+    blobs: Dict[str, int] = {}
+    mappings: List[Dict] = []
+
+    for result in results:
+        if not result.ok or not result.sha256:
+            continue
+
+        blobs[result.sha256] = result.size
+        for raw_filing_id in result.tags:
+            mappings.append({
+                "raw_filing_id": raw_filing_id,
+                "sha256": result.sha256,
+                "path": result.path
+            })
+
+    if blobs:
+        db.execute(
+            insert(Blob).on_conflict_do_nothing(index_elements=["sha256"]),
+            [{"sha256": sha256, "size": size} for sha256, size in blobs.items()]
+        )
+
+    if not mappings:
+        return 0
+
+    rows = db.execute(
+        insert(FilingBlob)
+        .on_conflict_do_nothing(index_elements=["raw_filing_id"])
+        .returning(FilingBlob.id),
+        mappings
+    ).all()
+
+    return len(rows)
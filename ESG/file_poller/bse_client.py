@@ -1,12 +1,32 @@
 # file_poller/bse_client.py
 
-import requests
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from common import metrics, transport
+
+PAGES_PER_SCRIP = metrics.histogram(
+    "bse_pages_per_scrip",
+    "Announcement pages fetched per scrip and date range",
+    buckets=metrics.COUNT_BUCKETS
+)
 
 
 class BSEClient:
     BASE_URL = "https://api.bseindia.com/BseIndiaAPI/api/AnnSubCategoryGetData/w"
 
-    def __init__(self):
+    def __init__(self, base_url: str = None, page_workers: int = 4, prefetch_pages: int = 2):
+        """
+        page_workers:   concurrent page requests per client (shared by all scrips).
+        prefetch_pages: pages requested ahead when BSE does not report a row count.
+        """
+        # Overridable for the benchmark stub servers
+        self.base_url = base_url or self.BASE_URL
+        self.page_workers = page_workers
+        self.prefetch_pages = prefetch_pages
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
             "Accept": "application/json",
@@ -14,45 +34,134 @@ class BSEClient:
             "Origin": "https://www.bseindia.com"
         }
 
-    def fetch_announcements(self, scrip_code: str, from_date: str, to_date: str):
-        """
-        Fetch announcements for a given scrip code and date range.
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
-        from_date, to_date format: YYYYMMDD
-        Example: 20250702
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.page_workers,
+                    thread_name_prefix="bse-pages"
+                )
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _fetch_page(self, scrip_code: str, from_date: str, to_date: str, page: int) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of announcements and the total row count, if BSE sent it.
         """
+        params = {
+            "pageno": page,
+            "strCat": -1,
+            "strPrevDate": from_date,
+            "strScrip": scrip_code,
+            "strSearch": "P",
+            "strToDate": to_date,
+            "strType": "C",
+            "subcategory": -1
+        }
 
-        all_results = []
-        page = 1
+        response = transport.get(
+            self.base_url,
+            params=params,
+            headers=self.headers,
+            timeout=30,
+            endpoint="announcements"
+        )
 
-        while True:
-            params = {
-                "pageno": page,
-                "strCat": -1,
-                "strPrevDate": from_date,
-                "strScrip": scrip_code,
-                "strSearch": "P",
-                "strToDate": to_date,
-                "strType": "C",
-                "subcategory": -1
-            }
+        response.raise_for_status()
+        data = response.json()
 
-            response = requests.get(
-                self.BASE_URL,
-                params=params,
-                headers=self.headers,
-                timeout=30
-            )
+        total = None
+        meta = data.get("Table1") or []
+        if meta and isinstance(meta[0], dict):
+            try:
+                total = int(meta[0].get("ROWCNT"))
+            except (TypeError, ValueError):
+                total = None
 
-            response.raise_for_status()
-            data = response.json()
+        return data.get("Table", []) or [], total
 
-            records = data.get("Table", [])
+    def _iter_pages(self, scrip_code: str, from_date: str, to_date: str) -> Iterator[List[Dict]]:
+        """
+        Yield non-empty pages in order.
 
+        When page 1 carries Table1[0].ROWCNT the remaining pages are known
+        and fetched concurrently (at most `page_workers * 2` ahead), with no
+        trailing empty request. Without a count, the next `prefetch_pages`
+        pages are requested speculatively and the walk stops at the first
+        empty or short page.
+        """
+        records, total = self._fetch_page(scrip_code, from_date, to_date, 1)
+        fetched = 1
+
+        try:
             if not records:
-                break
+                return
+            yield records
+
+            page_size = len(records)
+            if total is not None and total <= page_size:
+                return
+
+            last_page = math.ceil(total / page_size) if total is not None else None
+            ahead = self.page_workers * 2 if last_page is not None else self.prefetch_pages
+
+            pool = self._executor()
+            window: deque = deque()
+            next_page = 2
 
-            all_results.extend(records)
-            page += 1
+            try:
+                while True:
+                    while len(window) < max(ahead, 1) and (last_page is None or next_page <= last_page):
+                        window.append(pool.submit(self._fetch_page, scrip_code, from_date, to_date, next_page))
+                        next_page += 1
+                        fetched += 1
+
+                    if not window:
+                        return
+
+                    records, page_total = window.popleft().result()
+
+                    # Rows published while paging raise the count
+                    if last_page is not None and page_total is not None and page_total > total:
+                        total = page_total
+                        last_page = math.ceil(total / page_size)
+
+                    if not records:
+                        return
+                    yield records
+                    if len(records) < page_size:
+                        return
+            finally:
+                for future in window:
+                    future.cancel()
+
+        finally:
+            PAGES_PER_SCRIP.observe(fetched)
+
+    def iter_announcements(self, scrip_code: str, from_date: str, to_date: str) -> Iterator[Dict]:
+        """
+        Stream announcements page by page. Later pages are fetched while
+        the caller works through the current one.
+
+        from_date, to_date format: YYYYMMDD
+        """
+        for records in self._iter_pages(scrip_code, from_date, to_date):
+            yield from records
+
+    def fetch_announcements(self, scrip_code: str, from_date: str, to_date: str):
+        """
+        Fetch announcements for a given scrip code and date range.
+
+        from_date, to_date format: YYYYMMDD
+        Example: 20250702
+        """
 
-        return all_results
\ No newline at end of file
+        return list(self.iter_announcements(scrip_code, from_date, to_date))
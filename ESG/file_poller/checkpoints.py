@@ -0,0 +1,160 @@
+# file_poller/checkpoints.py
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import PollerCheckpoint
+
+# Re-read this much before the watermark, for announcements that BSE /
+# NSE index late with an older timestamp
+DEFAULT_OVERLAP = timedelta(days=1)
+
+# How far back the first run for a scope looks
+DEFAULT_LOOKBACK = timedelta(days=7)
+
+# Placeholder for "query the checkpoint row"
+_LOOKUP = object()
+
+NEWS_DT_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%b-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M:%S",
+    "%Y-%m-%d",
+)
+
+
+def parse_news_dt(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+
+    text = str(value).strip()
+    # BSE sometimes sends more than six fractional digits
+    if "." in text:
+        head, _, fraction = text.partition(".")
+        text = f"{head}.{fraction[:6]}"
+
+    for fmt in NEWS_DT_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def bse_key(record: Dict) -> Tuple[Optional[datetime], Optional[str]]:
+    return parse_news_dt(record.get("NEWS_DT")), record.get("NEWSID")
+
+
+def nse_key(record: Dict) -> Tuple[Optional[datetime], Optional[str]]:
+    seq = record.get("seq_id") or record.get("attchmntFile")
+    return parse_news_dt(record.get("an_dt") or record.get("sort_date")), str(seq) if seq else None
+
+
+class CheckpointWindow:
+    """
+    The incremental window for one (source, scope_key) checkpoint.
+
+        window = CheckpointWindow(db, "BSE", "500209")
+        records = window.track(client.iter_announcements("500209", window.from_date, window.to_date))
+        ... insert filings (FilingWriter skips ones already stored) ...
+        window.advance()
+        db.commit()     # filings and checkpoint together
+
+    `track` drops records repeated within the run and remembers the newest
+    (NEWS_DT, id) seen. Filings re-read inside the overlap are left to the
+    raw_filings unique key.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        source: str,
+        scope_key: str,
+        key: Callable[[Dict], Tuple[Optional[datetime], Optional[str]]] = bse_key,
+        overlap: timedelta = DEFAULT_OVERLAP,
+        lookback: timedelta = DEFAULT_LOOKBACK,
+        now: Optional[datetime] = None,
+        checkpoint=_LOOKUP
+    ):
+        self.db = db
+        self.source = source
+        self.scope_key = scope_key
+        self.key = key
+
+        now = now or datetime.now()
+
+        if checkpoint is _LOOKUP:
+            checkpoint = (
+                db.query(PollerCheckpoint)
+                .filter_by(source=source, scope_key=scope_key)
+                .one_or_none()
+            )
+        self.checkpoint: Optional[PollerCheckpoint] = checkpoint
+
+        self.watermark: Optional[datetime] = self.checkpoint.last_news_dt if self.checkpoint else None
+        self.watermark_id: Optional[str] = self.checkpoint.last_announcement_id if self.checkpoint else None
+
+        start = (self.watermark - overlap) if self.watermark else (now - lookback)
+        self.start = min(start, now)
+        self.end = now
+
+        self._newest: Tuple[Optional[datetime], Optional[str]] = (self.watermark, self.watermark_id)
+        self._seen: Set[str] = set()
+
+    @classmethod
+    def load(cls, db: Session, source: str, scope_keys: Iterable[str], **kwargs) -> List["CheckpointWindow"]:
+        """
+        Windows for many scopes of one source with a single query.
+        """
+        checkpoints = {
+            checkpoint.scope_key: checkpoint
+            for checkpoint in db.query(PollerCheckpoint).filter_by(source=source)
+        }
+        return [
+            cls(db, source, scope_key, checkpoint=checkpoints.get(scope_key), **kwargs)
+            for scope_key in scope_keys
+        ]
+
+    @property
+    def from_date(self) -> str:
+        return self.start.strftime("%Y%m%d")
+
+    @property
+    def to_date(self) -> str:
+        return self.end.strftime("%Y%m%d")
+
+    def track(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        for record in records:
+            news_dt, record_id = self.key(record)
+
+            if record_id is not None:
+                if record_id in self._seen or (news_dt == self.watermark and record_id == self.watermark_id):
+                    continue
+                self._seen.add(record_id)
+
+            if news_dt is not None and (self._newest[0] is None or news_dt > self._newest[0]):
+                self._newest = (news_dt, record_id)
+
+            yield record
+
+    def advance(self):
+        """
+        Move the checkpoint to the newest record seen. Added to the session
+        only; the caller commits it together with the filings.
+        """
+        news_dt, record_id = self._newest
+        if news_dt is None or news_dt == self.watermark and record_id == self.watermark_id:
+            return
+
+        if self.checkpoint is None:
+            self.checkpoint = PollerCheckpoint(source=self.source, scope_key=self.scope_key)
+            self.db.add(self.checkpoint)
+
+        self.checkpoint.last_news_dt = news_dt
+        self.checkpoint.last_announcement_id = record_id
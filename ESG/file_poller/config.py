@@ -18,7 +18,10 @@ DATABASE_URL = os.getenv(
 # Poller Settings
 # ==============================
 
-POLL_DELAY_SECONDS = 1          # Delay between NSE calls
+# NSE requests/second: starting pace and ceiling of the shared adaptive
+# limiter (see rate_limit.py), which backs off on 429 / 403 / block pages
+NSE_RATE = float(os.getenv("NSE_RATE", "0.5"))
+NSE_MAX_RATE = float(os.getenv("NSE_MAX_RATE", "3"))
 ANNOUNCEMENT_TYPE = "Annual Report"
 EXCHANGE = "NSE"
 
@@ -4,4 +4,18 @@ from sqlalchemy.orm import sessionmaker
 from .config import DATABASE_URL
 
 engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(bind=engine)
+
+
+def init_db():
+    """
+    Create missing tables and indexes in the esg schema. Existing tables
+    are left alone apart from gaining new indexes; adding the unique
+    raw_filings index fails until duplicate rows are removed.
+    """
+    from .models import Base
+    Base.metadata.create_all(engine, checkfirst=True)
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
@@ -0,0 +1,366 @@
+# file_poller/download_manager.py
+
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from common import metrics, transport
+from .blob_store import BlobStore
+
+PDF_BYTES = metrics.histogram(
+    "pdf_download_bytes",
+    "Size of downloaded filing attachments",
+    buckets=metrics.BYTES_BUCKETS
+)
+
+PDF_SECONDS = metrics.histogram(
+    "pdf_download_seconds",
+    "Time to download and write one filing attachment",
+    ("result",)
+)
+
+CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(Exception):
+    pass
+
+
+class DownloadResult:
+    """
+    status: "downloaded", "resumed", "skipped" (already complete) or "failed".
+    """
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        status: str,
+        size: int = 0,
+        error: Optional[str] = None,
+        sha256: Optional[str] = None,
+        duplicate: bool = False
+    ):
+        self.url = url
+        self.path = path
+        self.status = status
+        self.size = size
+        self.error = error
+        # Content hash when known; duplicate means the blob store had it
+        self.sha256 = sha256
+        self.duplicate = duplicate
+        # Caller labels (e.g. raw filing ids), see DownloadManager.submit
+        self.tags: List = []
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+    def __repr__(self):
+        return f"<DownloadResult {self.status} {self.path} {self.size}B>"
+
+
+def _sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_complete(path: str, expected_size: Optional[int] = None, sha256: Optional[str] = None) -> bool:
+    """
+    True when `path` matches `expected_size` and / or `sha256`. With
+    neither known an existing file proves nothing (it may be a torn copy
+    from before .part files), so it is not complete.
+    """
+    if not os.path.isfile(path):
+        return False
+
+    size = os.path.getsize(path)
+    if size == 0 or (expected_size is not None and size != expected_size):
+        return False
+    if expected_size is None and sha256 is None:
+        return False
+
+    return sha256 is None or _sha256_of(path) == sha256.lower()
+
+
+def download_file(
+    url: str,
+    path: str,
+    headers: Optional[Dict] = None,
+    expected_size: Optional[int] = None,
+    sha256: Optional[str] = None,
+    timeout: float = 60,
+    endpoint: str = "attachment",
+    store: Optional[BlobStore] = None
+) -> DownloadResult:
+    """
+    Stream `url` to `path` in CHUNK_SIZE pieces.
+
+    The body goes to `path + ".part"` and is renamed into place only after
+    the size (Content-Length / Content-Range, or `expected_size`) and the
+    optional SHA-256 check out, so readers never see a truncated file. A
+    leftover .part file is resumed with a Range request. An existing `path`
+    is skipped when it matches `expected_size` / `sha256`, links into
+    `store` (verified at ingest), or matches the Content-Length of a HEAD
+    request; otherwise it is downloaded again.
+
+    The body is hashed as it streams. With a `store`, the file is kept once
+    per hash and `path` becomes a link to it.
+    """
+    if expected_size is None and sha256 is None and os.path.isfile(path) and os.path.getsize(path):
+        stored = _stored_hash(path, store)
+        if stored is not None:
+            return DownloadResult(url, path, "skipped", os.path.getsize(path), sha256=stored)
+        expected_size = _remote_size(url, headers, timeout, endpoint)
+
+    if is_complete(path, expected_size, sha256):
+        return DownloadResult(url, path, "skipped", os.path.getsize(path), sha256=_stored_hash(path, store))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    part_path = path + PART_SUFFIX
+
+    start = time.perf_counter()
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+
+    try:
+        response = transport.get(url, headers=request_headers, timeout=timeout, stream=True, endpoint=endpoint)
+
+        try:
+            total = None
+
+            if response.status_code == 206 and offset:
+                match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    raise DownloadError(f"Unexpected Content-Range {response.headers.get('Content-Range')}")
+                if match.group(3) != "*":
+                    total = int(match.group(3))
+                mode = "ab"
+
+            elif response.status_code == 416 and offset:
+                # Nothing left to send: the part file may already be whole
+                match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    os.remove(part_path)
+                    raise DownloadError("Range not satisfiable; discarded partial file")
+                total = offset
+                mode = None
+
+            elif response.status_code == 200:
+                # No (or ignored) Range: start over
+                offset = 0
+                length = response.headers.get("Content-Length", "")
+                total = int(length) if length.isdigit() else None
+                mode = "wb"
+
+            else:
+                raise DownloadError(f"Status {response.status_code}")
+
+            digest = hashlib.sha256()
+            if offset:
+                with open(part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+
+            if mode is not None:
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        digest.update(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        finally:
+            response.close()
+
+        size = os.path.getsize(part_path)
+        expected = expected_size if expected_size is not None else total
+
+        if expected is not None and size != expected:
+            # Keep the part file; the next attempt resumes from here
+            raise DownloadError(f"Incomplete download: {size} of {expected} bytes")
+
+        content_hash = digest.hexdigest()
+        if sha256 and content_hash != sha256.lower():
+            os.remove(part_path)
+            raise DownloadError("Checksum mismatch")
+
+        duplicate = False
+        if store is not None:
+            duplicate = not store.ingest(part_path, content_hash)
+            store.link(content_hash, path)
+        else:
+            os.replace(part_path, path)
+
+    except Exception as e:
+        PDF_SECONDS.observe(time.perf_counter() - start, result="failed")
+        return DownloadResult(url, path, "failed", error=str(e))
+
+    status = "resumed" if offset else "downloaded"
+    PDF_BYTES.observe(size - offset)
+    PDF_SECONDS.observe(time.perf_counter() - start, result=status)
+
+    return DownloadResult(url, path, status, size, sha256=content_hash, duplicate=duplicate)
+
+
+def _remote_size(url: str, headers: Optional[Dict], timeout: float, endpoint: str) -> Optional[int]:
+    """
+    Content-Length from a HEAD request, or None when the server does not
+    say (or the request fails).
+    """
+    try:
+        response = transport.get_transport().request(
+            "HEAD", url, headers=dict(headers or {}), timeout=timeout, endpoint=endpoint, allow_redirects=True
+        )
+    except Exception:
+        return None
+
+    try:
+        length = response.headers.get("Content-Length", "")
+        return int(length) if response.status_code == 200 and length.isdigit() else None
+    finally:
+        response.close()
+
+
+def _stored_hash(path: str, store: Optional[BlobStore]) -> Optional[str]:
+    """
+    The hash of an existing file that links into `store`, from its name.
+    """
+    if store is None:
+        return None
+
+    name = os.path.basename(os.path.realpath(path))
+    sha256 = name[:-len(store.suffix)] if store.suffix and name.endswith(store.suffix) else name
+    if len(sha256) != 64 or not store.contains(sha256):
+        return None
+    return sha256 if os.path.samefile(path, store.path_for(sha256)) else None
+
+
+class DownloadManager:
+    """
+    Bounded download pool with a per-host concurrency limit.
+
+        with DownloadManager(workers=8, per_host=2) as downloads:
+            downloads.submit(url, path)
+            ...
+        downloads.results      # every DownloadResult, once closed
+        downloads.take_results()   # those finished since the last call
+
+    Submitting a path that is already queued returns the queued future;
+    its `tag` is added to the same result's tags.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        per_host: int = 2,
+        headers: Optional[Dict] = None,
+        store: Optional[BlobStore] = None
+    ):
+        self.workers = workers
+        self.per_host = per_host
+        self.headers = headers or {}
+        self.store = store
+
+        self.results: List[DownloadResult] = []
+        self._taken = 0
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="downloads")
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._pending: Dict[str, Future] = {}
+        self._tags: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _run(self, url: str, path: str, kwargs: Dict) -> DownloadResult:
+        try:
+            with self._host_slot(url):
+                result = download_file(url, path, **kwargs)
+        except Exception as e:
+            # e.g. an OSError before download_file's own error handling
+            result = DownloadResult(url, path, "failed", error=str(e))
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+                tags = self._tags.pop(path, [])
+
+        result.tags = tags
+
+        with self._lock:
+            self.results.append(result)
+
+        if result.ok:
+            print(f"[DOWNLOADED] {path} ({result.status}{', duplicate' if result.duplicate else ''})")
+        else:
+            print(f"[DOWNLOAD FAILED] {url}: {result.error}")
+
+        return result
+
+    def submit(self, url: str, path: str, tag=None, **kwargs) -> Future:
+        """
+        Queue a download; kwargs go to download_file.
+        """
+        kwargs.setdefault("headers", self.headers)
+        kwargs.setdefault("store", self.store)
+
+        with self._lock:
+            if tag is not None:
+                self._tags.setdefault(path, []).append(tag)
+
+            future = self._pending.get(path)
+            if future is None:
+                future = self._pending[path] = self._pool.submit(self._run, url, path, kwargs)
+            return future
+
+    def wait(self):
+        with self._lock:
+            futures = list(self._pending.values())
+        wait_futures(futures)
+
+    def close(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def take_results(self) -> List[DownloadResult]:
+        """
+        Results finished since the previous call.
+        """
+        with self._lock:
+            results = self.results[self._taken:]
+            self._taken = len(self.results)
+        return results
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for result in self.results:
+                counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    def __enter__(self) -> "DownloadManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,38 +1,52 @@
-import requests
 import os
 
+from .download_manager import download_file
+
+
+ATTACHMENT_BASE_URL = "https://www.bseindia.com/xml-data/corpfiling/AttachHis"
+
+# Proper headers to avoid 403 from BSE
+ATTACHMENT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Referer": "https://www.bseindia.com/",
+    "Origin": "https://www.bseindia.com",
+    "Accept": "application/pdf"
+}
 
-def download_pdf(attachment_name, symbol, financial_year):
-    """
-    Downloads PDF from BSE with proper headers to avoid 403.
-    """
 
-    url = f"https://www.bseindia.com/xml-data/corpfiling/AttachHis/{attachment_name}"
+# NSE archives answer plain browser requests without the site cookies
+NSE_ATTACHMENT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Referer": "https://www.nseindia.com/",
+    "Accept": "application/pdf"
+}
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-        "Referer": "https://www.bseindia.com/",
-        "Origin": "https://www.bseindia.com",
-        "Accept": "application/pdf"
-    }
 
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
+def attachment_url(attachment_name, base_url=ATTACHMENT_BASE_URL):
+    return f"{base_url}/{attachment_name}"
 
-        if response.status_code != 200:
-            print(f"[DOWNLOAD FAILED] Status {response.status_code}")
-            return
 
-        # Create folder structure
-        folder_path = os.path.join("data", symbol, financial_year)
-        os.makedirs(folder_path, exist_ok=True)
+def attachment_path(attachment_name, symbol, financial_year, output_dir="data"):
+    return os.path.join(output_dir, symbol, financial_year, attachment_name)
+
+
+def download_pdf(attachment_name, symbol, financial_year, base_url=ATTACHMENT_BASE_URL, output_dir="data"):
+    """
+    Downloads PDF from BSE, streamed to a temp file and renamed into place.
+    Use DownloadManager to run several at once.
+    """
 
-        file_path = os.path.join(folder_path, attachment_name)
+    file_path = attachment_path(attachment_name, symbol, financial_year, output_dir)
 
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+    result = download_file(
+        attachment_url(attachment_name, base_url),
+        file_path,
+        headers=ATTACHMENT_HEADERS
+    )
 
+    if result.ok:
         print(f"[DOWNLOADED] {file_path}")
+    else:
+        print(f"[DOWNLOAD FAILED] {result.error}")
 
-    except Exception as e:
-        print(f"[DOWNLOAD ERROR] {e}")
\ No newline at end of file
+    return result
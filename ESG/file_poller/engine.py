@@ -0,0 +1,556 @@
+# file_poller/engine.py
+#
+# asyncio poller: exchange sources run as concurrent producers, filtering,
+# inserts and download scheduling as one consumer behind a bounded queue.
+# The only poller; file_poller.main runs one cycle of it.
+#
+#   python -m file_poller.engine --nse
+#   python -m file_poller.engine --nse --daemon --interval 300
+
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy.orm import Session
+
+from common import metrics
+from .blob_store import BlobStore, record_blobs
+from .bse_client import BSEClient
+from .checkpoints import CheckpointWindow, nse_key
+from .db import SessionLocal, init_db
+from .download_manager import DownloadManager
+from .downloader import ATTACHMENT_HEADERS, NSE_ATTACHMENT_HEADERS, attachment_path, attachment_url
+from .filters import get_current_fy, iter_annual_reports, iter_brsr_filings
+from .logger import setup_logger
+from .nse_client import NSE_DATE_FORMAT, NSEClient
+from .tracking import TrackedCompanies
+from .writer import FilingWriter
+
+logger = setup_logger()
+
+DB_COMMIT_SECONDS = metrics.histogram(
+    "db_commit_seconds",
+    "Time to commit filing rows"
+)
+
+STAGE_SECONDS = metrics.histogram(
+    "poller_stage_seconds",
+    "Time spent per poller stage",
+    ("stage",)
+)
+
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "poller_queue_wait_seconds",
+    "Time producers waited for room in the announcement queue",
+    ("source",)
+)
+
+# BSE Scrip Codes (used when esg.listed_companies is empty)
+TARGET_SCRIP_CODES = {
+    "INFY": "500209",
+    "TCS": "532540"
+}
+
+# Beyond this many tracked scrips, one market-wide query (strScrip="")
+# costs fewer requests than a paginated query per scrip
+SWEEP_THRESHOLD = 10
+
+# Filings per INSERT ... ON CONFLICT DO NOTHING statement
+FILING_BATCH_SIZE = 500
+
+# Attachment downloads run beside the announcement loop
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_PER_HOST = 4
+
+# Announcements per queue item
+CHUNK_SIZE = 200
+
+
+class _Chunk:
+    """
+    A slice of one scope's announcements; `done` marks the scope's last
+    item, after which its checkpoint may advance.
+    """
+
+    def __init__(self, window: CheckpointWindow, records: List[Dict], done: bool = False):
+        self.window = window
+        self.records = records
+        self.done = done
+
+
+def commit_scope(db: Session, window: CheckpointWindow):
+    """
+    Commit a scope's filings together with its advanced checkpoint, so a
+    crash never moves the watermark past rows that were not stored.
+    """
+    window.advance()
+
+    start = time.perf_counter()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def queue_downloads(downloads: DownloadManager, filings: List[Dict]):
+    """
+    Queue the attachments of committed filings: BSE ones by attachment
+    name, NSE ones from their archive URL (source_url).
+    """
+    for filing_data in filings:
+        if filing_data.get("attachment_name"):
+            name = filing_data["attachment_name"]
+            url = attachment_url(name)
+            headers = ATTACHMENT_HEADERS
+        elif filing_data.get("exchange") == "NSE" and filing_data.get("source_url"):
+            url = filing_data["source_url"]
+            name = os.path.basename(urlsplit(url).path)
+            headers = NSE_ATTACHMENT_HEADERS
+        else:
+            continue
+
+        if not name:
+            continue
+
+        downloads.submit(
+            url,
+            attachment_path(
+                attachment_name=name,
+                symbol=filing_data["symbol"],
+                financial_year=filing_data["financial_year"]
+            ),
+            tag=filing_data["raw_filing_id"],
+            headers=headers
+        )
+
+
+def commit_blobs(db: Session, downloads: DownloadManager) -> int:
+    """
+    Map downloads finished since the last call to their filings, in a
+    commit of their own. Call it only with nothing else pending in the
+    session: every tagged filing was committed before it was queued.
+    """
+    results = downloads.take_results()
+    if not results:
+        return 0
+
+    try:
+        mapped = record_blobs(db, results)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Recording attachment blobs failed: {e}")
+        return 0
+
+    if mapped:
+        logger.info(f"Mapped {mapped} filings to stored attachments")
+    return mapped
+
+
+def load_tracked(db: Session) -> TrackedCompanies:
+    tracked = TrackedCompanies.from_db(db)
+    if len(tracked):
+        return tracked
+    return TrackedCompanies.from_targets(TARGET_SCRIP_CODES)
+
+
+class PollerEngine:
+    """
+    One cycle:
+
+    - a producer per checkpoint scope (one per BSE scrip or one BSE
+      sweep, plus one NSE sweep) pages through the exchange on a worker
+      thread, at most `bse_concurrency` / `nse_concurrency` at a time per
+      host, and pushes chunks onto a queue of `queue_size`;
+    - the consumer filters chunks and holds each scope's filings until
+      the scope's last chunk is through, then writes them in batches and
+      commits them with the scope's checkpoint; their attachments are
+      queued for download after that commit.
+
+    All database work runs on a single thread that owns the one session.
+    Only a finished scope's rows are ever written before a commit, so a
+    commit never carries another scope's half-written rows and a
+    checkpoint is never committed ahead of its rows. Scopes that fail
+    part way keep the filings read so far, committed at the end of the
+    cycle without their checkpoints. After a database error the cycle is
+    lost: producers stop paging and nothing more is written.
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        include_nse: bool = True,
+        bse_concurrency: int = 4,
+        nse_concurrency: int = 1,
+        queue_size: int = 64
+    ):
+        self.mode = mode
+        self.include_nse = include_nse
+        self.bse_concurrency = bse_concurrency
+        self.nse_concurrency = nse_concurrency
+        self.queue_size = queue_size
+
+        self.bse = BSEClient()
+        self.nse = NSEClient() if include_nse else None
+
+        # Producer threads block on the queue, so they get their own pool
+        self._io = ThreadPoolExecutor(
+            max_workers=bse_concurrency + nse_concurrency,
+            thread_name_prefix="poller-io"
+        )
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="poller-db")
+
+        self._stop = asyncio.Event()
+
+    def close(self):
+        self.bse.close()
+        self._io.shutdown(wait=False, cancel_futures=True)
+        self._db.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+
+    async def _on_db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db, fn, *args)
+
+    # -------------------------------------------------
+    # Producers
+    # -------------------------------------------------
+    def _produce(
+        self,
+        loop,
+        queue: asyncio.Queue,
+        window: CheckpointWindow,
+        records: Iterator[Dict],
+        abort: threading.Event
+    ) -> int:
+        """
+        Runs on an io thread. Blocks while the queue is full, which is what
+        keeps fast exchanges from outrunning the database. Stops paging
+        once `abort` is set; the scope then never reports done.
+        """
+        fetched = 0
+        chunk: List[Dict] = []
+
+        def put(item: _Chunk):
+            start = time.perf_counter()
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, source=window.source)
+
+        for record in window.track(records):
+            if abort.is_set():
+                return fetched
+            fetched += 1
+            chunk.append(record)
+            if len(chunk) >= CHUNK_SIZE:
+                put(_Chunk(window, chunk))
+                chunk = []
+
+        put(_Chunk(window, chunk, done=True))
+        return fetched
+
+    def _bse_records(self, window: CheckpointWindow) -> Iterator[Dict]:
+        scrip_code = "" if window.scope_key == "*" else window.scope_key
+        return self.bse.iter_announcements(scrip_code, window.from_date, window.to_date)
+
+    def _nse_records(self, window: CheckpointWindow) -> Iterator[Dict]:
+        return self.nse.iter_announcements_by_date(
+            window.start.strftime(NSE_DATE_FORMAT),
+            window.end.strftime(NSE_DATE_FORMAT)
+        )
+
+    async def _producer(
+        self,
+        queue: asyncio.Queue,
+        limit: asyncio.Semaphore,
+        window: CheckpointWindow,
+        abort: threading.Event,
+        stats: Dict
+    ):
+        records = self._bse_records if window.source == "BSE" else self._nse_records
+        loop = asyncio.get_running_loop()
+
+        async with limit:
+            if self._stop.is_set() or abort.is_set():
+                return
+            try:
+                with STAGE_SECONDS.time(stage="fetch"):
+                    fetched = await loop.run_in_executor(
+                        self._io, self._produce, loop, queue, window, records(window), abort
+                    )
+                stats["fetched"] += fetched
+            except Exception as e:
+                # The scope's checkpoint stays put; its rows so far are kept
+                stats["failed_scopes"] += 1
+                logger.error(f"{window.source} {window.scope_key} failed: {e}")
+
+    # -------------------------------------------------
+    # Consumer
+    # -------------------------------------------------
+    def _filter(self, tracked: TrackedCompanies, chunk: _Chunk, current_fy: str) -> Iterator[Dict]:
+        window = chunk.window
+
+        if window.source == "NSE":
+            return (
+                dict(filing, exchange="NSE")
+                for filing in iter_annual_reports(tracked.iter_nse(chunk.records))
+            )
+
+        if window.scope_key == "*":
+            return iter_brsr_filings(tracked.iter_bse(chunk.records), None, current_fy)
+
+        return iter_brsr_filings(chunk.records, window.scope_key, current_fy)
+
+    def _commit(self, db, uncommitted: List[Dict], downloads: DownloadManager, commit) -> int:
+        """
+        Run `commit`, then queue the attachments of every filing it made
+        durable and map finished downloads to their blobs. Filings of a
+        rolled back commit are dropped. Returns the mappings added.
+        """
+        try:
+            commit()
+        except Exception:
+            uncommitted.clear()
+            raise
+
+        queue_downloads(downloads, uncommitted)
+        uncommitted.clear()
+        return commit_blobs(db, downloads)
+
+    def _write(self, writer: FilingWriter, filings: List[Dict], uncommitted: List[Dict]):
+        result = writer.add_all(filings)
+        uncommitted.extend(result.inserted)
+        if result.inserted or result.skipped:
+            logger.info(f"Filing batch: {len(result.inserted)} inserted, {result.skipped} skipped")
+
+    def _consume(
+        self,
+        db,
+        writer: FilingWriter,
+        held: Dict[Tuple[str, str], List[Dict]],
+        uncommitted: List[Dict],
+        tracked: TrackedCompanies,
+        downloads: DownloadManager,
+        chunk: _Chunk,
+        current_fy: str
+    ) -> int:
+        window = chunk.window
+        scope = (window.source, window.scope_key)
+
+        with STAGE_SECONDS.time(stage="persist"):
+            filings = held.setdefault(scope, [])
+            filings.extend(self._filter(tracked, chunk, current_fy))
+
+            if not chunk.done:
+                return 0
+
+            self._write(writer, held.pop(scope), uncommitted)
+            return self._commit(db, uncommitted, downloads, lambda: commit_scope(db, window))
+
+    def _flush(
+        self,
+        db,
+        writer: FilingWriter,
+        held: Dict[Tuple[str, str], List[Dict]],
+        uncommitted: List[Dict],
+        downloads: DownloadManager
+    ) -> int:
+        """
+        Filings of scopes that failed part way, kept without their checkpoints.
+        """
+        with STAGE_SECONDS.time(stage="persist"):
+            for filings in held.values():
+                self._write(writer, filings, uncommitted)
+            held.clear()
+        return self._commit(db, uncommitted, downloads, db.commit)
+
+    async def _consumer(self, queue: asyncio.Queue, abort: threading.Event, consume, stats: Dict):
+        error: Optional[Exception] = None
+
+        while True:
+            chunk = await queue.get()
+            try:
+                if chunk is None:
+                    break
+                # After a database error keep draining, so producers blocked
+                # on the queue can finish
+                if error is None:
+                    stats["mapped_blobs"] += await self._on_db(consume, chunk)
+            except Exception as e:
+                error = e
+                abort.set()
+            finally:
+                queue.task_done()
+
+        if error is not None:
+            raise error
+
+    # -------------------------------------------------
+    # Cycles
+    # -------------------------------------------------
+    def _windows(self, db, tracked: TrackedCompanies, mode: str) -> List[CheckpointWindow]:
+        now = datetime.now()
+
+        bse_scopes = ["*"] if mode == "sweep" else list(tracked.scrip_codes)
+        windows = CheckpointWindow.load(db, "BSE", bse_scopes, now=now)
+
+        if self.nse is not None and tracked.symbols:
+            windows += CheckpointWindow.load(db, "NSE", ["*"], key=nse_key, now=now)
+
+        return windows
+
+    async def run_once(self) -> Dict:
+        started = time.perf_counter()
+        stats = {"fetched": 0, "failed_scopes": 0, "mapped_blobs": 0}
+
+        db = await self._on_db(SessionLocal)
+        writer = await self._on_db(FilingWriter, db, FILING_BATCH_SIZE)
+        # Filtered filings of scopes still being read, by (source, scope_key)
+        held: Dict[Tuple[str, str], List[Dict]] = {}
+        # Inserted filings waiting for a commit before their downloads
+        uncommitted: List[Dict] = []
+        # Set by the consumer after a database error
+        abort = threading.Event()
+        downloads = DownloadManager(
+            workers=DOWNLOAD_WORKERS,
+            per_host=DOWNLOAD_PER_HOST,
+            headers=ATTACHMENT_HEADERS,
+            store=BlobStore()
+        )
+
+        mode = self.mode
+
+        try:
+            tracked = await self._on_db(load_tracked, db)
+
+            if mode == "auto":
+                mode = "sweep" if len(tracked.scrip_codes) > SWEEP_THRESHOLD else "scrip"
+
+            windows = await self._on_db(self._windows, db, tracked, mode)
+
+            logger.info(
+                f"Polling {len(tracked.scrip_codes)} scrips, {len(tracked.symbols)} symbols "
+                f"({mode} mode, {len(windows)} scopes)"
+            )
+
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+            limits = {
+                "BSE": asyncio.Semaphore(self.bse_concurrency),
+                "NSE": asyncio.Semaphore(self.nse_concurrency),
+            }
+
+            current_fy = get_current_fy()
+
+            def consume(chunk: _Chunk) -> int:
+                return self._consume(db, writer, held, uncommitted, tracked, downloads, chunk, current_fy)
+
+            consumer = asyncio.create_task(self._consumer(queue, abort, consume, stats))
+
+            try:
+                await asyncio.gather(*(
+                    self._producer(queue, limits[window.source], window, abort, stats)
+                    for window in windows
+                ))
+            finally:
+                await queue.put(None)
+                await consumer
+
+            stats["mapped_blobs"] += await self._on_db(self._flush, db, writer, held, uncommitted, downloads)
+
+        except Exception as e:
+            await self._on_db(db.rollback)
+            logger.error(f"Poller cycle failed: {e}")
+
+        finally:
+            with STAGE_SECONDS.time(stage="download"):
+                await asyncio.get_running_loop().run_in_executor(None, downloads.close)
+
+            def finish():
+                try:
+                    return commit_blobs(db, downloads)
+                finally:
+                    db.close()
+
+            stats["mapped_blobs"] += await self._on_db(finish)
+
+        summary = {
+            "mode": mode,
+            "fetched": stats["fetched"],
+            "inserted": writer.inserted,
+            "skipped": writer.skipped,
+            "failed_scopes": stats["failed_scopes"],
+            "downloads": downloads.summary(),
+            "mapped_blobs": stats["mapped_blobs"],
+            "seconds": round(time.perf_counter() - started, 3),
+            "metrics": metrics.summary()
+        }
+        logger.info("Run summary: " + json.dumps(summary))
+        return summary
+
+    async def run_forever(self, interval: float):
+        """
+        Poll every `interval` seconds (measured start to start) until stop().
+        """
+        while not self._stop.is_set():
+            started = time.monotonic()
+            await self.run_once()
+
+            delay = max(interval - (time.monotonic() - started), 0)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _main(args):
+    await asyncio.get_running_loop().run_in_executor(None, init_db)
+
+    engine = PollerEngine(
+        mode=args.mode,
+        include_nse=args.nse,
+        bse_concurrency=args.bse_concurrency,
+        nse_concurrency=args.nse_concurrency,
+        queue_size=args.queue_size
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, engine.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        if args.daemon:
+            logger.info(f"Poller daemon started, every {args.interval}s")
+            await engine.run_forever(args.interval)
+        else:
+            await engine.run_once()
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Poll BSE and NSE announcements concurrently")
+    parser.add_argument("--mode", choices=("auto", "scrip", "sweep"), default="auto")
+    parser.add_argument("--nse", action="store_true", help="Also poll NSE announcements for tracked symbols")
+    parser.add_argument("--daemon", action="store_true", help="Keep polling every --interval seconds")
+    parser.add_argument("--interval", type=float, default=300.0)
+    parser.add_argument("--bse-concurrency", type=int, default=4, help="Concurrent BSE scopes")
+    parser.add_argument("--nse-concurrency", type=int, default=1, help="Concurrent NSE scopes")
+    parser.add_argument("--queue-size", type=int, default=64, help="Announcement chunks buffered for the consumer")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args))
@@ -1,7 +1,9 @@
 # file_poller/filters.py
 
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .downloader import ATTACHMENT_BASE_URL
 
 
 def get_current_fy() -> str:
@@ -17,15 +19,17 @@ def get_current_fy() -> str:
         return f"{today.year - 1}-{today.year}"
 
 
-def filter_annual_reports(announcements: List[Dict]) -> List[Dict]:
+def iter_annual_reports(announcements: Iterable[Dict]) -> Iterator[Dict]:
     """
     Filters announcements for:
     - Annual Report
     - Current FY
+
+    Consumes and yields one item at a time, so it can sit directly on
+    top of a streaming client.
     """
 
     current_fy = get_current_fy()
-    filtered_reports = []
 
     for item in announcements:
 
@@ -39,13 +43,46 @@ def filter_annual_reports(announcements: List[Dict]) -> List[Dict]:
 
         if "Annual Report" in subject and current_fy in subject:
 
-            filtered_reports.append({
+            yield {
                 "symbol": item.get("symbol"),
                 "filing_type": "Annual Report",
                 "filing_date": date,
                 "financial_year": current_fy,
                 "announcement_subject": subject,
                 "source_url": attachment
-            })
+            }
+
+
+def filter_annual_reports(announcements: Iterable[Dict]) -> List[Dict]:
+    return list(iter_annual_reports(announcements))
+
+
+def iter_brsr_filings(
+    announcements: Iterable[Dict],
+    scrip_code: Optional[str],
+    financial_year: str
+) -> Iterator[Dict]:
+    """
+    BSE announcements whose headline is a Business Responsibility (BRSR)
+    report, as raw filing rows. Streams like iter_annual_reports.
+    Without `scrip_code` (market-wide feeds) each record's SCRIP_CD is used.
+    """
+
+    for item in announcements:
+
+        headline = item.get("HEADLINE", "") or ""
+
+        if "Business Responsibility" not in headline and "BRSR" not in headline:
+            continue
+
+        attachment = item.get("ATTACHMENTNAME")
 
-    return filtered_reports
\ No newline at end of file
+        yield {
+            "symbol": scrip_code or str(item.get("SCRIP_CD", "")),
+            "filing_type": "Annual Report",
+            "filing_date": item.get("NEWS_DT"),
+            "financial_year": financial_year,
+            "announcement_subject": headline,
+            "source_url": f"{ATTACHMENT_BASE_URL}/{attachment}" if attachment else None,
+            "attachment_name": attachment
+        }
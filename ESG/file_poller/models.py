@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, Date, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -20,7 +20,11 @@ class ListedCompany(Base):
 
 class RawFiling(Base):
     __tablename__ = "raw_filings"
-    __table_args__ = {"schema": "esg"}
+    __table_args__ = (
+        # Natural key for idempotent inserts (ON CONFLICT DO NOTHING)
+        Index("uq_raw_filings_exchange_source_url", "exchange", "source_url", unique=True),
+        {"schema": "esg"}
+    )
 
     id = Column(Integer, primary_key=True)
     symbol = Column(String(50), nullable=False)
@@ -32,4 +36,42 @@ class RawFiling(Base):
     exchange = Column(String(10), default="NSE")
     status = Column(String(50), default="pending")
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now())
+
+
+class PollerCheckpoint(Base):
+    __tablename__ = "poller_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("source", "scope_key", name="uq_poller_checkpoints_source_scope"),
+        {"schema": "esg"}
+    )
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(20), nullable=False)        # BSE / NSE
+    scope_key = Column(String(50), nullable=False)     # scrip code, or "*" for a market-wide sweep
+    last_news_dt = Column(DateTime)
+    last_announcement_id = Column(String(100))
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class Blob(Base):
+    """
+    One stored attachment, keyed by the SHA-256 of its bytes.
+    """
+    __tablename__ = "blobs"
+    __table_args__ = {"schema": "esg"}
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
+class FilingBlob(Base):
+    __tablename__ = "filing_blobs"
+    __table_args__ = {"schema": "esg"}
+
+    id = Column(Integer, primary_key=True)
+    raw_filing_id = Column(Integer, ForeignKey("esg.raw_filings.id"), unique=True, nullable=False)
+    sha256 = Column(String(64), ForeignKey("esg.blobs.sha256"), nullable=False, index=True)
+    path = Column(Text)        # legacy data/<symbol>/<fy>/<attachment_name> link
+    created_at = Column(DateTime, default=func.now())
@@ -1,16 +1,45 @@
 # file_poller/nse_client.py
 
 import requests
+import threading
 import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from .config import NSE_MAX_RATE, NSE_RATE
+from .rate_limit import AdaptiveRateLimiter, shared_limiter
+from common.transport import UPSTREAM_SECONDS
+
+
+NSE_DATE_FORMAT = "%d-%m-%Y"
+
+# Homepage cookies (nsit / nseappid) expire after a few minutes
+COOKIE_MAX_AGE_SECONDS = 240
+
+
+class NSEFetchError(Exception):
+    pass
 
 
 class NSEClient:
     BASE_URL = "https://www.nseindia.com"
-    ANNOUNCEMENT_API = "https://www.nseindia.com/api/corporate-announcements"
+    ANNOUNCEMENT_PATH = "/api/corporate-announcements"
 
-    def __init__(self):
+    def __init__(self, base_url: str = None, limiter: Optional[AdaptiveRateLimiter] = None):
+        """
+        No network I/O here: the cookie bootstrap runs on the first request.
+        Requests are paced by `limiter`, by default shared by every client
+        of the same host.
+        """
+        # Overridable for the benchmark stub servers
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.announcement_api = self.base_url + self.ANNOUNCEMENT_PATH
+        self.host = urlsplit(self.base_url).hostname or ""
         self.session = requests.Session()
 
+        self.limiter = limiter or shared_limiter(self.host, rate=NSE_RATE, max_rate=NSE_MAX_RATE)
+
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
             "Accept": "application/json, text/plain, */*",
@@ -19,49 +48,143 @@ class NSEClient:
             "Connection": "keep-alive",
         }
 
-        self._initialize_session()
+        self._session_lock = threading.Lock()
+        self._session_at: Optional[float] = None
 
-    def _initialize_session(self):
+    def _initialize_session(self, stale_at: Optional[float] = None):
         """
-        Hit homepage first to establish cookies.
+        Hit homepage first to establish cookies. Threads that saw the same
+        stale session (`stale_at`) refresh it only once.
         """
-        try:
-            self.session.get(self.BASE_URL, headers=self.headers, timeout=10)
-        except Exception as e:
-            print(f"[NSE INIT ERROR] {e}")
+        with self._session_lock:
+            if self._session_at is not None and self._session_at != stale_at:
+                if time.monotonic() - self._session_at < COOKIE_MAX_AGE_SECONDS:
+                    return
 
-    def fetch_announcements_by_date(self, from_date: str, to_date: str):
+            self.session.cookies.clear()
+            self.limiter.acquire()
+            try:
+                self.session.get(self.base_url, headers=self.headers, timeout=10)
+            except Exception as e:
+                print(f"[NSE INIT ERROR] {e}")
+
+            self._session_at = time.monotonic()
+
+    def _get_json(self, url: str, params: Dict, endpoint: str, attempts: int = 2):
         """
-        Fetch corporate announcements between dates.
-        Date format: DD-MM-YYYY
+        Paced GET returning the decoded JSON. A blocked (403 / non-JSON)
+        answer refreshes the cookies and is retried once; 429 and 403 slow
+        the shared limiter down. Raises NSEFetchError when no attempt
+        returned JSON.
         """
+        error = "no attempts"
 
-        params = {
-            "from_date": from_date,
-            "to_date": to_date
-        }
+        for attempt in range(attempts):
+            self._initialize_session()
+            session_at = self._session_at
 
-        try:
-            response = self.session.get(
-                self.ANNOUNCEMENT_API,
-                headers=self.headers,
-                params=params,
-                timeout=20
+            self.limiter.acquire()
+
+            start = time.perf_counter()
+            response = self.session.get(url, headers=self.headers, params=params, timeout=20)
+            elapsed = time.perf_counter() - start
+
+            UPSTREAM_SECONDS.observe(
+                elapsed,
+                provider=self.host,
+                endpoint=endpoint,
+                status=str(response.status_code)
             )
 
+            if response.status_code in (403, 429):
+                retry_after = response.headers.get("Retry-After", "")
+                self.limiter.on_throttle(
+                    str(response.status_code),
+                    float(retry_after) if retry_after.isdigit() else None
+                )
+                print(f"[NSE STATUS ERROR] {response.status_code}")
+                error = f"status {response.status_code}"
+                if response.status_code == 403:
+                    self._initialize_session(stale_at=session_at)
+                continue
+
             if response.status_code != 200:
                 print(f"[NSE STATUS ERROR] {response.status_code}")
-                return []
+                raise NSEFetchError(f"status {response.status_code}")
 
             if "application/json" not in response.headers.get("Content-Type", ""):
                 print("[NSE BLOCKED] Non-JSON response received")
-                return []
+                self.limiter.on_throttle("blocked")
+                self._initialize_session(stale_at=session_at)
+                error = "blocked"
+                continue
+
+            self.limiter.on_success(elapsed)
+            return response.json()
+
+        raise NSEFetchError(f"{endpoint} failed after {attempts} attempts: {error}")
+
+    @staticmethod
+    def _records(data) -> List[Dict]:
+        if data is None:
+            return []
+        return data if isinstance(data, list) else data.get("data", [])
+
+    def _announcements_by_date(self, from_date: str, to_date: str) -> List[Dict]:
+        params = {
+            "from_date": from_date,
+            "to_date": to_date
+        }
+        return self._records(self._get_json(self.announcement_api, params, "corporate-announcements"))
+
+    def fetch_announcements_by_date(self, from_date: str, to_date: str):
+        """
+        Fetch corporate announcements between dates; [] on failure.
+        Date format: DD-MM-YYYY
+        """
+
+        try:
+            return self._announcements_by_date(from_date, to_date)
+
+        except Exception as e:
+            print(f"[NSE FETCH ERROR] {e}")
+            return []
 
-            data = response.json()
-            time.sleep(2)  # gentle delay
+    def fetch_announcements(self, symbol: str):
+        """
+        Corporate announcements for one equity symbol.
+        """
 
-            return data if isinstance(data, list) else data.get("data", [])
+        params = {
+            "index": "equities",
+            "symbol": symbol
+        }
+
+        try:
+            return self._records(self._get_json(self.announcement_api, params, "corporate-announcements"))
 
         except Exception as e:
             print(f"[NSE FETCH ERROR] {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def iter_announcements_by_date(self, from_date: str, to_date: str, window_days: int = 7) -> Iterator[Dict]:
+        """
+        Stream announcements between dates, one `window_days` window per
+        request, so a multi-month backfill never holds more than one
+        window in memory. A failed window raises (NSEFetchError or the
+        request error) instead of looking empty, so callers tracking a
+        checkpoint never move it past announcements they did not see.
+        Date format: DD-MM-YYYY
+        """
+        start = datetime.strptime(from_date, NSE_DATE_FORMAT)
+        end = datetime.strptime(to_date, NSE_DATE_FORMAT)
+
+        while start <= end:
+            window_end = min(start + timedelta(days=max(window_days, 1) - 1), end)
+
+            yield from self._announcements_by_date(
+                start.strftime(NSE_DATE_FORMAT),
+                window_end.strftime(NSE_DATE_FORMAT)
+            )
+
+            start = window_end + timedelta(days=1)
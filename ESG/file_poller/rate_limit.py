@@ -0,0 +1,113 @@
+# file_poller/rate_limit.py
+
+import threading
+import time
+from typing import Dict, Optional
+
+from common import metrics
+
+THROTTLES = metrics.counter(
+    "rate_limiter_throttles_total",
+    "Responses that made a rate limiter back off",
+    ("limiter", "reason")
+)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate follows the upstream (AIMD):
+
+    - every fast success adds `increase` requests/second, up to `max_rate`;
+    - a 429 / 403 / block page multiplies the rate by `decrease` and, with
+      a Retry-After, pauses everyone until it has passed;
+    - a success slower than `latency_target` counts as a mild slowdown.
+
+    One instance is meant to be shared by every client of a host, across
+    threads, so the host sees a single paced stream.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        rate: float = 1.0,
+        min_rate: float = 0.1,
+        max_rate: float = 5.0,
+        burst: float = 2.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        latency_target: float = 2.0
+    ):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+
+        self._tokens = min(burst, 1.0)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def on_success(self, latency: Optional[float] = None):
+        with self._lock:
+            if latency is not None and latency > self.latency_target:
+                self.rate = max(self.min_rate, self.rate * (1 - (1 - self.decrease) / 4))
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, reason: str, retry_after: Optional[float] = None):
+        THROTTLES.inc(limiter=self.name, reason=reason)
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"name": self.name, "rate": round(self.rate, 3), "tokens": round(self._tokens, 3)}
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def shared_limiter(name: str, **kwargs) -> AdaptiveRateLimiter:
+    """
+    The process-wide limiter for `name` (usually a host); kwargs only
+    apply when it is first created.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = AdaptiveRateLimiter(name=name, **kwargs)
+        return limiter
@@ -1,10 +1,26 @@
+import threading
+
 from .nse_client import NSEClient
 from .filters import filter_annual_reports
 
-nse = NSEClient()
+_nse = None
+_nse_lock = threading.Lock()
+
+
+def get_nse() -> NSEClient:
+    """
+    Shared client, built on first use so importing this module does no I/O.
+    """
+    global _nse
+
+    with _nse_lock:
+        if _nse is None:
+            _nse = NSEClient()
+        return _nse
+
 
 def process_company(symbol):
-    announcements = nse.fetch_announcements(symbol)
+    announcements = get_nse().fetch_announcements(symbol)
     reports = filter_annual_reports(announcements)
 
-    return reports
\ No newline at end of file
+    return reports
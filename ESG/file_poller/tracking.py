@@ -0,0 +1,78 @@
+# file_poller/tracking.py
+
+from typing import Dict, Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from .models import ListedCompany
+
+
+class TrackedCompanies:
+    """
+    In-memory index of the companies we poll for, so a market-wide
+    announcement feed can be fanned out with one dict lookup per record
+    instead of one exchange query per company.
+
+    BSE announcements are matched on SCRIP_CD, NSE announcements on symbol.
+    """
+
+    def __init__(self, scrip_codes: Optional[Dict[str, str]] = None, symbols: Iterable[str] = ()):
+        # scrip code -> display name (symbol when known)
+        self.scrip_codes: Dict[str, str] = {
+            str(code).strip(): name for code, name in (scrip_codes or {}).items()
+        }
+        self.symbols = {symbol.strip().upper() for symbol in symbols if symbol}
+
+    def __len__(self) -> int:
+        return len(self.scrip_codes) + len(self.symbols)
+
+    @classmethod
+    def from_targets(cls, targets: Dict[str, str]) -> "TrackedCompanies":
+        """
+        From a {symbol: bse_scrip_code} mapping like TARGET_SCRIP_CODES.
+        """
+        return cls(
+            scrip_codes={code: symbol for symbol, code in targets.items()},
+            symbols=targets.keys()
+        )
+
+    @classmethod
+    def from_db(cls, db: Session) -> "TrackedCompanies":
+        """
+        Active esg.listed_companies rows. BSE rows store the scrip code
+        in `symbol`; everything else is treated as an NSE symbol.
+        """
+        scrip_codes: Dict[str, str] = {}
+        symbols = set()
+
+        rows = (
+            db.query(ListedCompany.symbol, ListedCompany.exchange)
+            .filter(ListedCompany.is_active.isnot(False))
+            .yield_per(1000)
+        )
+
+        for symbol, exchange in rows:
+            if (exchange or "").upper() == "BSE" and symbol.strip().isdigit():
+                scrip_codes[symbol.strip()] = symbol.strip()
+            else:
+                symbols.add(symbol)
+
+        return cls(scrip_codes=scrip_codes, symbols=symbols)
+
+    def match_bse(self, record: Dict) -> Optional[str]:
+        code = str(record.get("SCRIP_CD", "")).strip()
+        return code if code in self.scrip_codes else None
+
+    def match_nse(self, record: Dict) -> Optional[str]:
+        symbol = (record.get("symbol") or "").strip().upper()
+        return symbol if symbol in self.symbols else None
+
+    def iter_bse(self, announcements: Iterable[Dict]) -> Iterator[Dict]:
+        for record in announcements:
+            if self.match_bse(record) is not None:
+                yield record
+
+    def iter_nse(self, announcements: Iterable[Dict]) -> Iterator[Dict]:
+        for record in announcements:
+            if self.match_nse(record) is not None:
+                yield record
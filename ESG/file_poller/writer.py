@@ -0,0 +1,176 @@
+# file_poller/writer.py
+
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from common import metrics
+from .checkpoints import parse_news_dt
+from .models import RawFiling
+
+BATCH_ROWS = metrics.histogram(
+    "filing_batch_rows",
+    "Filings per batched insert",
+    ("result",),
+    buckets=metrics.COUNT_BUCKETS
+)
+
+BATCH_SECONDS = metrics.histogram(
+    "filing_batch_seconds",
+    "Time per batched filing insert"
+)
+
+# Natural key of a raw filing; see uq_raw_filings_exchange_source_url
+NATURAL_KEY = ("exchange", "source_url")
+
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class BatchResult:
+    def __init__(self, inserted: List[Dict], skipped: int):
+        # Filings that produced a new row, in the order they were added,
+        # with their new "raw_filing_id"
+        self.inserted = inserted
+        self.skipped = skipped
+
+    def __repr__(self):
+        return f"<BatchResult inserted={len(self.inserted)} skipped={self.skipped}>"
+
+
+def filing_row(filing: Dict) -> Dict:
+    """
+    Column values for one esg.raw_filings row.
+    """
+    filing_dt = parse_news_dt(filing.get("filing_date"))
+
+    return {
+        "symbol": filing["symbol"],
+        "filing_type": filing["filing_type"],
+        "filing_date": filing_dt.date() if filing_dt else None,
+        "financial_year": filing["financial_year"],
+        "announcement_subject": filing["announcement_subject"],
+        "source_url": filing["source_url"],
+        "exchange": filing.get("exchange", "BSE"),
+        "status": "pending"
+    }
+
+
+class FilingWriter:
+    """
+    Buffers filings and writes them with one
+    INSERT ... ON CONFLICT (exchange, source_url) DO NOTHING RETURNING
+    per batch, instead of a commit per row.
+
+        writer = FilingWriter(db, batch_size=500)
+        for filing in filings:
+            result = writer.add(filing)     # a BatchResult when a batch was written
+        result = writer.flush()
+        db.commit()
+
+    Existing rows are never updated: their status belongs to the
+    downstream pipeline. Nothing is committed unless `commit=True`, so the
+    caller can commit batches together with other state (checkpoints).
+    """
+
+    def __init__(self, db: Session, batch_size: int = 500, commit: bool = False):
+        self.db = db
+        self.batch_size = batch_size
+        self.commit = commit
+
+        self.inserted = 0
+        self.skipped = 0
+
+        self._buffer: Dict[Tuple[str, str], Dict] = {}
+        self._duplicates = 0
+        self._unkeyed = 0
+
+        dialect = db.get_bind().dialect.name
+        if dialect not in DIALECT_INSERTS:
+            raise ValueError(f"FilingWriter does not support the {dialect} dialect")
+        self._insert = DIALECT_INSERTS[dialect]
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, filing: Dict) -> Optional[BatchResult]:
+        """
+        Buffer one filing; writes and returns a batch once `batch_size`
+        distinct filings are waiting.
+        """
+        if not filing.get("source_url"):
+            # Reported as skipped with the next batch
+            self._unkeyed += 1
+            return None
+
+        key = (filing.get("exchange", "BSE"), filing["source_url"])
+        if key in self._buffer:
+            self._duplicates += 1
+        else:
+            self._buffer[key] = filing
+
+        if len(self._buffer) >= self.batch_size:
+            return self.flush()
+        return None
+
+    def add_all(self, filings: Iterable[Dict]) -> BatchResult:
+        inserted: List[Dict] = []
+        skipped = 0
+
+        for filing in filings:
+            result = self.add(filing)
+            if result is not None:
+                inserted.extend(result.inserted)
+                skipped += result.skipped
+
+        result = self.flush()
+        return BatchResult(inserted + result.inserted, skipped + result.skipped)
+
+    def flush(self) -> BatchResult:
+        """
+        Write the buffered filings. Skipped counts rows already stored,
+        repeats within the batch and filings without a source_url.
+        """
+        keys = list(self._buffer.keys())
+        filings = list(self._buffer.values())
+        unwritten = self._duplicates + self._unkeyed
+
+        self._buffer = {}
+        self._duplicates = 0
+        self._unkeyed = 0
+
+        if not filings:
+            self.skipped += unwritten
+            return BatchResult([], unwritten)
+
+        stmt = (
+            self._insert(RawFiling)
+            .on_conflict_do_nothing(index_elements=list(NATURAL_KEY))
+            .returning(RawFiling.id, RawFiling.exchange, RawFiling.source_url)
+        )
+
+        start = time.perf_counter()
+        rows = self.db.execute(stmt, [filing_row(filing) for filing in filings]).all()
+        if self.commit:
+            self.db.commit()
+        BATCH_SECONDS.observe(time.perf_counter() - start)
+
+        written = {(exchange, source_url): row_id for row_id, exchange, source_url in rows}
+        inserted = [
+            dict(filing, raw_filing_id=written[key])
+            for key, filing in zip(keys, filings)
+            if key in written
+        ]
+        skipped = len(filings) - len(inserted) + unwritten
+
+        BATCH_ROWS.observe(len(inserted), result="inserted")
+        BATCH_ROWS.observe(skipped, result="skipped")
+
+        self.inserted += len(inserted)
+        self.skipped += skipped
+
+        return BatchResult(inserted, skipped)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# file_poller is imported as a top-level package, next to the shared
+# `common` package and the benchmark stubs at the repository root
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(PROJECT))
+sys.path.insert(0, PROJECT)
@@ -0,0 +1,108 @@
+import hashlib
+import os
+
+import pytest
+
+from benchmarks.stubs import BSE_ATTACHMENT_PATH, StubConfig, StubServer
+from file_poller.download_manager import PART_SUFFIX, DownloadManager, download_file
+
+
+@pytest.fixture
+def stub():
+    with StubServer("bse", StubConfig(latency_ms=0, jitter_ms=0, pdf_kb=64)) as server:
+        yield server
+
+
+def _url(server):
+    return server.url + BSE_ATTACHMENT_PATH + "/filing.pdf"
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_fresh_download(stub, tmp_path):
+    path = str(tmp_path / "filing.pdf")
+
+    result = download_file(_url(stub), path)
+
+    assert result.status == "downloaded"
+    assert _read(path) == stub.pdf_body
+    assert result.sha256 == hashlib.sha256(stub.pdf_body).hexdigest()
+    assert not os.path.exists(path + PART_SUFFIX)
+
+
+def test_partial_file_is_resumed_with_range(stub, tmp_path):
+    path = str(tmp_path / "filing.pdf")
+    _write(path + PART_SUFFIX, stub.pdf_body[:1000])
+
+    result = download_file(_url(stub), path)
+
+    assert result.status == "resumed"
+    assert _read(path) == stub.pdf_body
+    assert result.sha256 == hashlib.sha256(stub.pdf_body).hexdigest()
+
+
+def test_whole_part_file_is_kept_on_416(stub, tmp_path):
+    path = str(tmp_path / "filing.pdf")
+    _write(path + PART_SUFFIX, stub.pdf_body)
+
+    result = download_file(_url(stub), path)
+
+    assert result.status == "resumed"
+    assert result.size == len(stub.pdf_body)
+    assert _read(path) == stub.pdf_body
+
+
+def test_server_ignoring_range_restarts_the_download(tmp_path):
+    with StubServer("bse", StubConfig(latency_ms=0, jitter_ms=0, pdf_kb=64, ranges=False)) as server:
+        path = str(tmp_path / "filing.pdf")
+        _write(path + PART_SUFFIX, server.pdf_body[:1000])
+
+        result = download_file(_url(server), path)
+
+        assert result.status == "downloaded"
+        assert _read(path) == server.pdf_body
+
+
+def test_checksum_mismatch_fails_and_discards_the_body(stub, tmp_path):
+    path = str(tmp_path / "filing.pdf")
+
+    result = download_file(_url(stub), path, sha256="0" * 64)
+
+    assert result.status == "failed"
+    assert result.error == "Checksum mismatch"
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + PART_SUFFIX)
+
+
+def test_truncated_file_without_known_size_is_downloaded_again(stub, tmp_path):
+    path = str(tmp_path / "filing.pdf")
+    _write(path, stub.pdf_body[:1000])
+
+    result = download_file(_url(stub), path)
+
+    assert result.status == "downloaded"
+    assert _read(path) == stub.pdf_body
+
+    assert download_file(_url(stub), path).status == "skipped"
+
+
+def test_manager_records_errors_raised_before_the_download(stub, tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_bytes(b"")
+    path = str(blocker / "filing.pdf")
+
+    with DownloadManager(workers=1) as downloads:
+        downloads.submit(_url(stub), path, tag=7).result()
+
+    results = downloads.take_results()
+    assert [result.status for result in results] == ["failed"]
+    assert results[0].tags == [7]
+    assert downloads.summary() == {"failed": 1}
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from file_poller.models import Base
+from file_poller.writer import FilingWriter
+
+
+def _session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _attach(connection, _):
+        connection.execute("ATTACH DATABASE ':memory:' AS esg")
+
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+
+def _filing(n, **overrides):
+    filing = {
+        "symbol": "ABC",
+        "filing_type": "BRSR",
+        "filing_date": "2024-01-01 10:00:00",
+        "financial_year": "2023-24",
+        "announcement_subject": f"Report {n}",
+        "source_url": f"https://example.com/{n}.pdf",
+        "exchange": "BSE"
+    }
+    filing.update(overrides)
+    return filing
+
+
+def test_add_all_totals_cover_every_filing():
+    db = _session()
+    writer = FilingWriter(db, batch_size=2)
+
+    filings = [
+        _filing(0),
+        _filing(1, source_url=None),
+        _filing(0),
+        _filing(2),
+        _filing(3, source_url=""),
+        _filing(4)
+    ]
+    result = writer.add_all(filings)
+
+    assert [f["source_url"] for f in result.inserted] == [
+        "https://example.com/0.pdf",
+        "https://example.com/2.pdf",
+        "https://example.com/4.pdf"
+    ]
+    assert len(result.inserted) + result.skipped == len(filings)
+    assert (writer.inserted, writer.skipped) == (3, 3)
+
+    # Already stored rows are skipped on the next run
+    result = FilingWriter(db).add_all([_filing(0), _filing(5, source_url=None)])
+    assert (len(result.inserted), result.skipped) == (0, 2)
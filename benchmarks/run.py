@@ -0,0 +1,268 @@
+# benchmarks/run.py
+#
+# Drive the clients and Flask routes against local stub servers:
+#
+#   PYTHONPATH=CompanyFinancials:ESG python -m benchmarks.run --scenario all
+#   PYTHONPATH=CompanyFinancials:ESG python -m benchmarks.run --scenario insta \
+#       --requests 500 --concurrency 32 --latency-ms 200 --error-rate 0.02
+#
+# Prints throughput and p50/p95/p99 per scenario; --json for machine output.
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks.stubs import (
+    BSE_API_PATH,
+    BSE_ATTACHMENT_PATH,
+    INSTA_API_PATH,
+    StubConfig,
+    StubServer,
+)
+
+SCENARIOS = ("insta", "insta_cached", "bse", "nse", "pdf", "web")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def measure(name: str, call: Callable[[int], None], requests: int, concurrency: int) -> Dict:
+    """
+    Run `call(i)` for i in range(requests) on `concurrency` threads and
+    summarise the per-call latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            call(i)
+            failed = False
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _cin(i: int) -> str:
+    return f"U{i % 100000:05d}MH2000PLC{i:06d}"
+
+
+# -------------------------------------------------
+# Scenarios
+# -------------------------------------------------
+def bench_insta(args, config: StubConfig, cached: bool = False) -> Dict:
+    from providers.cache import ResponseCache
+    from providers.instafinancials import InstaFinancialsClient
+    from providers.singleflight import SingleFlight
+
+    with StubServer("insta", config) as stub, tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(path=os.path.join(tmp, "cache.sqlite3")) if cached else None
+        client = InstaFinancialsClient(
+            api_key="bench",
+            base_url=stub.url + INSTA_API_PATH,
+            cache=cache,
+            singleflight=SingleFlight() if cached else None
+        )
+
+        def call(i: int):
+            # With the cache, a small working set so repeats hit it
+            cin = _cin(random.randrange(args.distinct) if cached else i)
+            client.fetch_company_data("CompanyCIN", cin, "All")
+
+        result = measure("insta_cached" if cached else "insta", call, args.requests, args.concurrency)
+        result["upstream_requests"] = stub.counters.get("requests", 0)
+        return result
+
+
+def bench_bse(args, config: StubConfig) -> Dict:
+    from file_poller.bse_client import BSEClient
+
+    with StubServer("bse", config) as stub:
+        client = BSEClient(base_url=stub.url + BSE_API_PATH)
+
+        def call(i: int):
+            client.fetch_announcements(str(500000 + i), "20250601", "20250602")
+
+        # Each call pages through a whole scrip, so scale the count down
+        result = measure("bse", call, max(args.requests // config.pages, 1), args.concurrency)
+        result["upstream_requests"] = stub.counters.get("requests", 0)
+        return result
+
+
+def bench_nse(args, config: StubConfig) -> Dict:
+    from file_poller.nse_client import NSEClient
+    from file_poller.rate_limit import AdaptiveRateLimiter
+
+    with StubServer("nse", config) as stub:
+        local = threading.local()
+        # Measure the client, not the production pacing
+        limiter = AdaptiveRateLimiter("bench", rate=args.nse_rate, max_rate=args.nse_rate, burst=args.concurrency)
+
+        def call(i: int):
+            # NSEClient keeps cookies on one session; one per thread
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = NSEClient(base_url=stub.url, limiter=limiter)
+            if not client.fetch_announcements_by_date("01-06-2025", "02-06-2025"):
+                raise RuntimeError("empty NSE response")
+
+        result = measure("nse", call, args.requests, args.concurrency)
+        result["upstream_requests"] = stub.counters.get("requests", 0)
+        return result
+
+
+def bench_pdf(args, config: StubConfig) -> Dict:
+    from file_poller.downloader import download_pdf
+
+    with StubServer("bse", config) as stub, tempfile.TemporaryDirectory() as tmp:
+        def call(i: int):
+            name = f"bench_{i}.pdf"
+            download_pdf(name, "500209", "2024-25", base_url=stub.url + BSE_ATTACHMENT_PATH, output_dir=tmp)
+            if not os.path.exists(os.path.join(tmp, "500209", "2024-25", name)):
+                raise RuntimeError("download failed")
+
+        result = measure("pdf", call, args.requests, args.concurrency)
+        result["bytes_per_file"] = config.pdf_kb * 1024
+        return result
+
+
+def bench_web(args, config: StubConfig) -> Dict:
+    from web.app import create_app
+    from web.settings import load_settings
+
+    with StubServer("insta", config) as stub, tempfile.TemporaryDirectory() as tmp:
+        settings = load_settings()
+        settings.update({
+            "insta_api_key": "bench",
+            "webhook_url": None,
+            "base_url": stub.url + INSTA_API_PATH,
+            "cache_path": os.path.join(tmp, "cache", "responses.sqlite3"),
+            "jobs_db_path": os.path.join(tmp, "jobs.sqlite3"),
+            "search_index_path": os.path.join(tmp, "search.sqlite3"),
+            "scheduler_path": os.path.join(tmp, "watchlist.sqlite3"),
+            "scheduler_enabled": False
+        })
+        app = create_app(settings, start_background=False)
+        local = threading.local()
+
+        def call(i: int):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = app.test_client()
+            cin = _cin(random.randrange(args.distinct))
+            response = client.get(f"/api/company/{cin}?fields=DirectorSignatoryMasterBasic")
+            if response.status_code != 200:
+                raise RuntimeError(f"status {response.status_code}")
+
+        result = measure("web", call, args.requests, args.concurrency)
+        result["upstream_requests"] = stub.counters.get("requests", 0)
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark clients and routes against local stub servers")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=50, help="Distinct CINs for cached / web scenarios")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--pdf-kb", type=int, default=512)
+    parser.add_argument("--nse-rate", type=float, default=1000.0, help="NSE requests/second allowed by the limiter")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+
+    def config() -> StubConfig:
+        return StubConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            payload_kb=args.payload_kb,
+            pages=args.pages,
+            pdf_kb=args.pdf_kb,
+            seed=args.seed
+        )
+
+    runners = {
+        "insta": lambda: bench_insta(args, config()),
+        "insta_cached": lambda: bench_insta(args, config(), cached=True),
+        "bse": lambda: bench_bse(args, config()),
+        "nse": lambda: bench_nse(args, config()),
+        "pdf": lambda: bench_pdf(args, config()),
+        "web": lambda: bench_web(args, config()),
+    }
+
+    selected = SCENARIOS if args.scenario == "all" else (args.scenario,)
+
+    for name in selected:
+        try:
+            # The clients print per call; keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                result = runners[name]()
+        except ImportError as e:
+            print(f"[BENCH SKIPPED] {name}: {e}", file=sys.stderr)
+            continue
+
+        if args.json:
+            print(json.dumps(result))
+        else:
+            extra = " ".join(
+                f"{key}={result[key]}" for key in ("upstream_requests", "bytes_per_file") if key in result
+            )
+            print(
+                f"{name:<13} n={result['requests']:<5} c={result['concurrency']:<3} "
+                f"err={result['errors']:<4} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+                f"p99={result['p99_ms']:.1f}ms {extra}".rstrip()
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# benchmarks/stubs.py
+#
+# Local stand-ins for the upstream APIs, so clients can be measured
+# without touching InstaFinancials or the exchanges:
+#
+#   with StubServer("bse", StubConfig(latency_ms=80, error_rate=0.05)) as bse:
+#       BSEClient(base_url=bse.url + BSE_API_PATH).fetch_announcements(...)
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+INSTA_API_PATH = "/api/InstaBasic/v1/json"
+BSE_API_PATH = "/BseIndiaAPI/api/AnnSubCategoryGetData/w"
+BSE_ATTACHMENT_PATH = "/xml-data/corpfiling/AttachHis"
+NSE_API_PATH = "/api/corporate-announcements"
+
+KINDS = ("insta", "bse", "nse")
+
+
+class StubConfig:
+    """
+    Behaviour of a stub server.
+
+    latency_ms / jitter_ms: added to every response (uniform jitter).
+    error_rate:             share of requests answered with `error_status`.
+    payload_kb:             approximate JSON body size per page / company.
+    pages:                  BSE pages per scrip (the last one is empty).
+    records_per_page:       BSE / NSE rows per page.
+    pdf_kb:                 attachment size.
+    ranges:                 honour Range on attachments; False answers
+                            200 with the whole body, like some CDNs.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 10.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        payload_kb: int = 20,
+        pages: int = 5,
+        records_per_page: int = 50,
+        pdf_kb: int = 512,
+        ranges: bool = True,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_kb = payload_kb
+        self.pages = pages
+        self.records_per_page = records_per_page
+        self.pdf_kb = pdf_kb
+        self.ranges = ranges
+        self.random = random.Random(seed)
+
+
+def _padding(size_bytes: int) -> str:
+    return "x" * max(size_bytes, 0)
+
+
+def insta_company(cin: str, payload_kb: int) -> Dict:
+    # Directors carry most of the body, like real large companies
+    directors = max(payload_kb * 1024 // 256, 1)
+    return {
+        "Response": {"Status": "Success", "RequestId": f"stub-{cin}"},
+        "CompanyMasterSummary": {
+            "CompanyCIN": cin,
+            "CompanyName": f"Stub Company {cin[-6:]} Limited",
+            "CompanyStatus": "Active",
+            "LastUpdatedDateTime": "2025-06-02T10:00:00"
+        },
+        "DirectorSignatoryMasterBasic": {
+            "DirectorCurrentMasterBasic": [
+                {
+                    "DIN": f"{i:08d}",
+                    "DirectorName": f"Director {i}",
+                    "Designation": "Director",
+                    "Notes": _padding(160)
+                }
+                for i in range(directors)
+            ]
+        }
+    }
+
+
+def bse_page(scrip: str, page: int, config: StubConfig) -> Dict:
+    total = config.records_per_page * max(config.pages - 1, 0)
+    if page >= config.pages:
+        return {"Table": [], "Table1": [{"ROWCNT": total}]}
+
+    per_row = config.payload_kb * 1024 // max(config.records_per_page, 1)
+    rows = [
+        {
+            "NEWSID": f"{scrip}-{page}-{i}",
+            "SCRIP_CD": int(scrip) if scrip.isdigit() else scrip,
+            "NEWS_DT": "2025-06-02T10:00:00",
+            "HEADLINE": (
+                "Business Responsibility and Sustainability Report"
+                if i % 10 == 0 else "Intimation under Regulation 30"
+            ),
+            "ATTACHMENTNAME": f"{scrip}_{page}_{i}.pdf",
+            "MORE": _padding(per_row - 200)
+        }
+        for i in range(config.records_per_page)
+    ]
+    return {"Table": rows, "Table1": [{"ROWCNT": total}]}
+
+
+def nse_announcements(config: StubConfig) -> List[Dict]:
+    per_row = config.payload_kb * 1024 // max(config.records_per_page, 1)
+    return [
+        {
+            "symbol": f"STUB{i}",
+            "desc": "Annual Report" if i % 5 == 0 else "General Updates",
+            "an_dt": "02-Jun-2025 10:00:00",
+            "attchmntFile": f"https://nsearchives.example/stub_{i}.pdf",
+            "attchmntText": _padding(per_row - 150)
+        }
+        for i in range(config.records_per_page)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    # Set by StubServer
+    kind = ""
+    config: StubConfig = None
+    counters: Dict[str, int] = None
+    lock: threading.Lock = None
+    pdf_body = b""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, name: str):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, payload):
+        self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        config = self.config
+        self._count("requests")
+
+        delay = config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if config.error_rate and config.random.random() < config.error_rate:
+            self._count("errors")
+            self._send(config.error_status, b'{"error":"stub"}', "application/json")
+            return
+
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        route = getattr(self, f"_route_{self.kind}")
+        route(parts.path, query)
+
+    def _route_insta(self, path: str, query: Dict):
+        match = re.match(rf"{re.escape(INSTA_API_PATH)}/([^/]+)/([^/]+)/([^/]+)$", path)
+        if not match:
+            self._send(404, b"{}", "application/json")
+            return
+        self._json(insta_company(match.group(2).upper(), self.config.payload_kb))
+
+    def _route_bse(self, path: str, query: Dict):
+        if path == BSE_API_PATH:
+            page = int(query.get("pageno", 1))
+            self._json(bse_page(query.get("strScrip", ""), page, self.config))
+        elif path.startswith(BSE_ATTACHMENT_PATH + "/"):
+            self._attachment()
+        else:
+            self._send(404, b"{}", "application/json")
+
+    def _attachment(self):
+        body = self.pdf_body
+        match = re.match(r"bytes=(\d+)-$", self.headers.get("Range", "")) if self.config.ranges else None
+        if match and int(match.group(1)) < len(body):
+            start = int(match.group(1))
+            self._send(206, body[start:], "application/pdf", {
+                "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}",
+                "Accept-Ranges": "bytes"
+            })
+        elif match:
+            self._send(416, b"", "application/pdf", {"Content-Range": f"bytes */{len(body)}"})
+        else:
+            self._send(200, body, "application/pdf", {"Accept-Ranges": "bytes"})
+
+    def _route_nse(self, path: str, query: Dict):
+        if path in ("", "/"):
+            self._send(200, b"<html></html>", "text/html", {"Set-Cookie": "nsit=stub; Path=/"})
+        elif path == NSE_API_PATH:
+            self._json(nse_announcements(self.config))
+        else:
+            self._send(404, b"{}", "application/json")
+
+
+class StubServer:
+    """
+    A threaded HTTP server on 127.0.0.1 playing one upstream (`kind`).
+    """
+
+    def __init__(self, kind: str, config: Optional[StubConfig] = None, port: int = 0):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown stub kind {kind}")
+
+        self.kind = kind
+        self.config = config or StubConfig()
+        self.counters: Dict[str, int] = {}
+
+        pdf_body = b"%PDF-1.4\n" + bytes(self.config.random.getrandbits(8) for _ in range(256))
+        pdf_body = (pdf_body * (self.config.pdf_kb * 1024 // len(pdf_body) + 1))[:self.config.pdf_kb * 1024]
+
+        self.pdf_body = pdf_body
+
+        handler = type(f"{kind.title()}StubHandler", (_Handler,), {
+            "kind": kind,
+            "config": self.config,
+            "counters": self.counters,
+            "lock": threading.Lock(),
+            "pdf_body": pdf_body
+        })
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name=f"stub-{self.kind}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a stub upstream server")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--pdf-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    stub = StubServer(args.kind, StubConfig(
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        payload_kb=args.payload_kb,
+        pages=args.pages,
+        pdf_kb=args.pdf_kb
+    ), port=args.port)
+
+    print(f"[STUB] {args.kind} listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
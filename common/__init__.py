@@ -0,0 +1 @@
+# common/__init__.py
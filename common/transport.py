@@ -0,0 +1,220 @@
+# common/transport.py
+#
+# Pooled HTTP sessions with retries, shared by the web app's providers and
+# the ESG poller.
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from common import metrics
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Statuses that say a billed call was turned away, not processed
+BILLED_RETRY_STATUSES = {429, 503}
+
+UPSTREAM_SECONDS = metrics.histogram(
+    "upstream_request_seconds",
+    "Latency of upstream HTTP calls, per attempt",
+    ("provider", "endpoint", "status")
+)
+
+UPSTREAM_RETRIES = metrics.counter(
+    "upstream_retries_total",
+    "Upstream calls retried after an error status or connection failure",
+    ("provider", "endpoint")
+)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic.
+
+    Every request deposits `ratio` tokens and every retry withdraws one, so a
+    struggling upstream sees at most ~`ratio` extra load instead of a retry
+    storm. The budget starts at `min_tokens`, so a client can retry a few
+    times before its own traffic has earned any; it is not replenished
+    other than by requests.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Transport:
+    """
+    Per-host keep-alive sessions with bounded pools and retry with backoff.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget or RetryBudget()
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=True,
+                    max_retries=0
+                )
+                session.mount(host, adapter)
+                self._sessions[host] = session
+
+        return session
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+
+        # Full jitter: uniform(0, base * 2^attempt), capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _unsent(error: Exception) -> bool:
+        """
+        True when the request cannot have reached the server: the
+        connection was never established.
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if isinstance(error, requests.Timeout):
+            return False
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        endpoint: str = "default",
+        billed: bool = False,
+        **kwargs
+    ) -> requests.Response:
+        """
+        `endpoint` only labels the latency metrics; keep it low-cardinality
+        (never a CIN or file name).
+
+        `billed` calls (paid lookups) are charged once the server has them,
+        so they are only retried when the connection failed or the server
+        answered 429 / 503; never after a read timeout.
+        """
+        session = self.session_for(url)
+        retryable = method.upper() in RETRY_METHODS
+        retry_statuses = BILLED_RETRY_STATUSES if billed else RETRY_STATUSES
+        provider = urlsplit(url).hostname or ""
+        attempt = 0
+
+        self.budget.deposit()
+
+        while True:
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                UPSTREAM_SECONDS.observe(
+                    time.perf_counter() - start,
+                    provider=provider, endpoint=endpoint, status="error"
+                )
+                if (
+                    not retryable
+                    or (billed and not self._unsent(e))
+                    or attempt >= self.max_retries
+                    or not self.budget.withdraw()
+                ):
+                    raise
+                UPSTREAM_RETRIES.inc(provider=provider, endpoint=endpoint)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            UPSTREAM_SECONDS.observe(
+                time.perf_counter() - start,
+                provider=provider, endpoint=endpoint, status=str(response.status_code)
+            )
+
+            if (
+                response.status_code in retry_statuses
+                and retryable
+                and attempt < self.max_retries
+                and self.budget.withdraw()
+            ):
+                UPSTREAM_RETRIES.inc(provider=provider, endpoint=endpoint)
+                delay = self._backoff(attempt, response)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Process-wide default shared by all clients
+_default_transport: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    global _default_transport
+
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_transport().get(url, **kwargs)